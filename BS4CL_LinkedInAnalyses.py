@@ -1,67 +1,326 @@
+import os
+import subprocess
+import sys
+from collections.abc import Mapping
+from contextlib import nullcontext
+
 import streamlit as st
 import pandas as pd
-import altair as alt
+
+from bs4cl import charts, ingest, insights, posts, profiling, rollups, store, watcher
 
 st.set_page_config(layout="wide")
 st.title("BS4CL LinkedIn Page 2025")
 
 # =============================================================================
-# Function to load Excel sheets from a file path
+# Diagnostics (opt-in): stage timings, memory deltas and cache hits per rerun
+# =============================================================================
+# Switch on with the sidebar "Diagnostics" toggle, or for every session with
+# BS4CL_PROFILE=1. Set BS4CL_PROFILE_LOG to a file to append each stage as a
+# JSON line (see bs4cl/profiling.py).
+PROFILE_LOG = os.environ.get("BS4CL_PROFILE_LOG")
+diagnostics_on = st.session_state.get("diagnostics", os.environ.get("BS4CL_PROFILE") == "1")
+profile = profiling.RerunProfile("startup", PROFILE_LOG) if diagnostics_on else None
+profiling.set_current(profile)
+
+
+def stage(name):
+    """Time a stage of this rerun when diagnostics are on."""
+    return profile.stage(name) if profile else nullcontext()
+
+
+def render_diagnostics(profile):
+    with diagnostics_panel.container():
+        st.caption(f"Rerun {profile.rerun_id} ({profile.label})")
+        st.dataframe(pd.DataFrame(profile.stages), hide_index=True)
+        if profile.cache:
+            st.dataframe(pd.DataFrame(profile.cache_summary()).T)
+
 # =============================================================================
-def load_excel_sheets(file_path):
+# Metrics store: new exports are appended, sheets are read back lazily
+# =============================================================================
+# Any LinkedIn export found under EXPORTS_DIR (including one sub-folder per
+# organisation) is appended to the SQLite metrics store (see bs4cl/store.py)
+# by a background watcher (bs4cl/watcher.py), and only the dates the store does
+# not have yet are added; new exports are parsed in parallel on a process pool
+# (owned by a `python -m bs4cl.store` subprocess, so the server itself never
+# forks). The dashboard then reads every sheet from the store, so refreshing
+# with a new export never re-reads the full history. Sheets are cached in
+# memory for the whole process, keyed on the store revision, and the watcher
+# loads them before publishing a new revision.
+#
+# Both locations can be configured through the environment, e.g.
+#   BS4CL_EXPORTS_DIR=/data/linkedin streamlit run BS4CL_LinkedInAnalyses.py
+EXPORTS_DIR = os.environ.get("BS4CL_EXPORTS_DIR", ".")
+DB_PATH = os.environ.get("BS4CL_DB", store.DEFAULT_DB)
+DEFAULT_PAGE = "business-schools-4-climate-leadership-africa"
+# Short sidebar names; other pages are titled from their slug.
+PAGE_LABELS = {DEFAULT_PAGE: "BS4CL"}
+MAX_CACHED_SHEETS = 32
+# How often the background watcher looks for new exports.
+WATCH_SECONDS = float(os.environ.get("BS4CL_WATCH_SECONDS", watcher.POLL_SECONDS))
+
+
+@st.cache_resource(show_spinner=False)
+def _open_store(db_path):
+    return store.MetricsStore(db_path)
+
+
+def _ingest_exports(db_path, signatures):
+    """Append the new exports to the store; return {path: error} for those that could not be loaded."""
+    # signatures is the (path, mtime_ns, content_hash) of every export.
+    new_exports = [path for path, _, _ in signatures if not _open_store(db_path).is_ingested(path)]
+    if not new_exports:
+        return {}
+    result = subprocess.run(
+        [sys.executable, "-m", "bs4cl.store", "--db", os.path.abspath(db_path),
+         *(os.path.abspath(path) for path in new_exports)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+    )
+    if result.returncode == 0:
+        return {}
+    # bs4cl.store reports each export it could not parse as "<path>: <error>"; the rest are stored.
+    errors = result.stderr.strip().splitlines()
+    failed = {}
+    for path in new_exports:
+        prefix = f"{os.path.abspath(path)}: "
+        for line in errors:
+            if line.startswith(prefix):
+                failed[path] = line[len(prefix):]
+    if not failed:
+        raise RuntimeError(errors[-1] if errors else f"bs4cl.store exited with status {result.returncode}")
+    return failed
+
+
+# Loaded data lives once per process and is shared by every session:
+# st.cache_resource hands out the cached object itself (st.cache_data would
+# unpickle a fresh copy per session and rerun). Every read is pinned to the
+# store revision it is keyed on, so a rerun that started on one revision gets
+# that revision's data even when it misses the cache after newer exports were
+# appended. Sessions only keep their widget selections.
+@profiling.track_cache("sheet names", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner=False))
+def _read_sheet_names(db_path, revision, page, kind):
+    return tuple(_open_store(db_path).sheet_names(page, kind, revision))
+
+
+@profiling.track_cache("sheets", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner=False))
+def _load_sheet(db_path, revision, page, kind, sheet_name):
+    return _open_store(db_path).load_sheet(page, kind, sheet_name, revision)
+
+
+@profiling.track_cache("rollups", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner=False))
+def _build_rollup(db_path, revision, page, kind, sheet_name):
+    return rollups.Rollup(_load_sheet(db_path, revision, page, kind, sheet_name))
+
+
+@profiling.track_cache("calendars", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner=False))
+def _build_calendar(db_path, revision, page, kind, sheet_name):
+    return rollups.CalendarIndex(_load_sheet(db_path, revision, page, kind, sheet_name))
+
+
+@profiling.track_cache("competitor history", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner=False))
+def _load_competitor_history(db_path, revision, page, sheet_name, competitors=None):
+    # competitors is a tuple (or None for all) so it can be part of the cache key.
+    return _open_store(db_path).competitor_history(page, sheet_name, competitors, revision)
+
+
+@profiling.track_cache("post rankings", st.cache_resource(max_entries=MAX_CACHED_SHEETS, show_spinner="Ranking posts..."))
+def _rank_posts(signatures, db_path, revision, page):
+    # signatures is the (path, mtime_ns, content_hash) of the page's content
+    # exports, newest first, so a new or changed export re-ranks them.
+    followers = posts.page_follower_counts(
+        StoredSheets(db_path, revision, page, ingest.FOLLOWERS),
+        StoredSheets(db_path, revision, page, ingest.COMPETITOR),
+        page,
+    )
+    return posts.rank_posts([path for path, _, _ in signatures], followers)
+
+
+class StoredSheets(Mapping):
+    """Read-only mapping of sheet name -> normalized DataFrame for one page's export kind.
+
+    Sheets are returned as shallow copies of the shared frame: no data is
+    copied, and with copy-on-write (pandas 3) anything a view does to its
+    frame stays out of the shared one.
+    """
+
+    def __init__(self, db_path, revision, page, kind):
+        self.key = (db_path, revision, page, kind)
+        self.sheet_names = _read_sheet_names(*self.key)
+
+    def __getitem__(self, sheet_name):
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+        return _load_sheet(*self.key, sheet_name).copy(deep=False)
+
+    def __iter__(self):
+        return iter(self.sheet_names)
+
+    def __len__(self):
+        return len(self.sheet_names)
+
+    def rollup(self, sheet_name):
+        """Precomputed date-range aggregates for a time-series sheet."""
+        return _build_rollup(*self.key, sheet_name)
+
+    def history(self, sheet_name, competitors=None):
+        """Every ingested export period of a competitor sheet, optionally for some competitors only."""
+        db_path, revision, page, _ = self.key
+        competitors = None if competitors is None else tuple(sorted(competitors))
+        return _load_competitor_history(db_path, revision, page, sheet_name, competitors).copy(deep=False)
+
+    def calendar(self, sheet_name):
+        """Weekday / week / month / hour codes for a time-series sheet's heatmaps."""
+        return _build_calendar(*self.key, sheet_name)
+
+
+@profiling.track_cache("pages", st.cache_resource(show_spinner=False))
+def _list_pages(db_path, revision):
+    return tuple(_open_store(db_path).pages(revision))
+
+
+def _warm_caches(db_path, revision):
+    """Load a revision's sheets and rollups before it is published, default page first."""
+    pages = sorted(_list_pages(db_path, revision), key=lambda page: page != DEFAULT_PAGE)
+    warmed = 0
+    for page in pages:
+        for kind in (ingest.COMPETITOR, ingest.FOLLOWERS, ingest.VISITORS):
+            for sheet_name in _read_sheet_names(db_path, revision, page, kind):
+                if warmed == MAX_CACHED_SHEETS:
+                    return
+                if isinstance(_load_sheet(db_path, revision, page, kind, sheet_name).index, pd.DatetimeIndex):
+                    _build_rollup(db_path, revision, page, kind, sheet_name)
+                    _build_calendar(db_path, revision, page, kind, sheet_name)
+                warmed += 1
+
+
+@st.cache_resource(show_spinner=False)
+def _start_watcher(exports_dir, db_path, interval):
+    def refresh(signatures):
+        failed = _ingest_exports(db_path, signatures)
+        return _open_store(db_path).revision(), failed
+
+    export_watcher = watcher.ExportWatcher(
+        exports_dir, refresh, lambda revision: _warm_caches(db_path, revision), interval,
+    )
+    export_watcher.start()
+    return export_watcher
+
+
+def refresh_store():
+    """The latest store revision the background watcher has loaded and warmed."""
+    export_watcher = _start_watcher(EXPORTS_DIR, DB_PATH, WATCH_SECONDS)
+    with st.spinner("Adding new exports to the metrics store..."):
+        revision = export_watcher.wait_ready()
+    if export_watcher.error is not None:
+        st.error(f"Error loading exports from '{EXPORTS_DIR}': {export_watcher.error}")
+    for path, error in export_watcher.errors.items():
+        st.error(f"Could not load {os.path.basename(path)}: {error}")
+    return revision if revision is not None else _open_store(DB_PATH).revision()
+
+
+def page_title(page):
+    return PAGE_LABELS.get(page, page.replace("-", " ").title())
+
+
+def load_export_sheets(revision, page, kind):
     try:
-        xls = pd.ExcelFile(file_path)
-        # Load each sheet with no header; we’ll process headers later.
-        return {sheet: xls.parse(sheet, header=None) for sheet in xls.sheet_names}
+        return StoredSheets(DB_PATH, revision, page, kind)
     except Exception as e:
-        st.error(f"Error loading {file_path}: {e}")
+        st.error(f"Error loading {kind} data: {e}")
         return {}
 
-# =============================================================================
-# Define file paths (update these paths as needed)
-# =============================================================================
-competitor_file = "Business Schools 4 Climate Leadership Africa_competitor_analytics_1739343948666.xlsx"
-visitors_file   = "business-schools-4-climate-leadership-africa_visitors_1739343988681.xlsx"
-followers_file  = "business-schools-4-climate-leadership-africa_followers_1739343974503.xlsx"
+
+def show_activity_patterns(calendar, metric_options, start, end):
+    """Weekday x week (and hour) heatmaps and seasonality of one metric."""
+    st.subheader("Activity Patterns")
+    metric = st.selectbox("Pattern Metric", metric_options)
+    with stage("calendar"):
+        by_week = calendar.weekday_by_week(metric, start, end)
+        by_hour = calendar.weekday_by_hour(metric, start, end)
+        seasonality = calendar.seasonality(metric, start, end)
+    if by_week.empty:
+        st.info("No data in the selected range.")
+        return
+    st.altair_chart(charts.calendar_heatmap(by_week, "Week", "Weekday", metric, f"{metric} by Day of Week"),
+                    use_container_width=True)
+    if by_hour is not None:
+        st.altair_chart(charts.calendar_heatmap(by_hour, "Hour", "Weekday", metric, f"Average {metric} by Hour"),
+                        use_container_width=True)
+    weekday_col, month_col = st.columns(2)
+    for column, name in ((weekday_col, "Weekday"), (month_col, "Month")):
+        with column:
+            st.altair_chart(charts.seasonality_bar_chart(seasonality[name], metric), use_container_width=True)
+    by_weekday = seasonality["Weekday"]
+    if by_weekday["Share %"].isna().all():
+        st.info(f"No {metric} recorded in the selected range.")
+        return
+    busiest = by_weekday.loc[by_weekday["Average"].idxmax()]
+    st.write(f"**{metric}** is highest on **{busiest['Weekday']}**, with "
+             f"**{busiest['Share %']:.1f}%** of the total in the selected range.")
 
 # Can improve via more metrics
-# Metrics such as likes, comments, and shares for each post or update. 
-# # Add a table or chart ranking posts by total engagement (or an “engagement rate”) to quickly identify the most effective content.
-# Time-of-Day/Day-of-Week Insights
 # Automated Summary or Insights
-# Aggregate daily or hourly data to see when the page gets the most visitors or new followers.
 
 # =============================================================================
-# Load data from each file
+# Load data from the metrics store (sheets are read on selection)
 # =============================================================================
-competitor_data = load_excel_sheets(competitor_file)
-visitors_data   = load_excel_sheets(visitors_file)
-followers_data  = load_excel_sheets(followers_file)
+with stage("refresh store"):
+    revision = refresh_store()
+pages = _list_pages(DB_PATH, revision)
+if not pages:
+    st.error(f"No LinkedIn exports found in '{EXPORTS_DIR}'")
+    st.stop()
 
 # =============================================================================
-# Sidebar: Data Source Selection
+# Sidebar: Organisation and Data Source Selection
 # =============================================================================
 st.sidebar.image("gibs logo horiz_whitebackbluefont.png", width=200)
-st.sidebar.header("BS4CL Page Metrics")
+page = st.sidebar.selectbox("Organisation", pages, format_func=page_title,
+                            index=pages.index(DEFAULT_PAGE) if DEFAULT_PAGE in pages else 0)
+st.sidebar.header(f"{page_title(page)} Page Metrics")
+
+competitor_data = load_export_sheets(revision, page, ingest.COMPETITOR)
+visitors_data   = load_export_sheets(revision, page, ingest.VISITORS)
+followers_data  = load_export_sheets(revision, page, ingest.FOLLOWERS)
+
 data_source = st.sidebar.radio("What would you like to analyse?", 
-                               ["Competitor Analytics", "Followers", "Visitors"])
+                               ["Competitor Analytics", "Followers", "Visitors", "Posts"])
+if profile:
+    profile.label = data_source
 
 # Determine which dictionary of sheets to use based on selection.
 if data_source == "Competitor Analytics":
     sheets = competitor_data
 elif data_source == "Followers":
     sheets = followers_data
-else:
+elif data_source == "Visitors":
     sheets = visitors_data
+else:
+    # Posts are streamed from the content exports rather than read from the store.
+    sheets = None
 
 # Sidebar: Select a sheet from the chosen file.
-if sheets:
+if data_source == "Posts":
+    df = None
+elif sheets:
     sheet_name = st.sidebar.selectbox("Select Sheet", list(sheets.keys()))
-    df = sheets[sheet_name]
+    try:
+        with stage("load sheet"):
+            df = sheets[sheet_name]
+    except Exception as e:
+        st.error(f"Error loading sheet {sheet_name}: {e}")
+        st.stop()
 else:
     st.error("No sheets loaded from the file.")
     st.stop()
 
+st.sidebar.toggle("Diagnostics", value=diagnostics_on, key="diagnostics")
+diagnostics_panel = st.sidebar.empty()
+if profile:
+    profile.on_update = render_diagnostics
+    render_diagnostics(profile)
+
 # =============================================================================
 # Process Data Based on the Selected Data Source
 # =============================================================================
@@ -71,47 +330,27 @@ else:
 # -------------------------------
 if data_source == "Competitor Analytics":
     st.header("Competitor Analytics")
-    try:
-        # Assume the first row contains start_date and end_date info.
-        start_date, end_date = df.iloc[0, 0], df.iloc[0, 1]
-        df = df.iloc[1:]
-        # The next row holds the column headers.
-        df.columns = df.iloc[0]
-        df = df[1:].reset_index(drop=True)
-    except Exception as e:
-        st.error("Error during preprocessing: " + str(e))
-    
+    # The export's leading (start_date, end_date) row is kept by the ingest step.
+    start_date, end_date = df.attrs.get("period", ("?", "?"))
     st.write(f"**Data Period:** {start_date} to {end_date}")
     st.subheader("Competitors")
     st.dataframe(df)
     
     # Automated Insights for key metrics.
-    competitor_col = df.columns[0]
-    automated_insights = []
-    
-    # Check for "Total Followers" metric.
-    if "Total Followers" in df.columns:
-        df["Total Followers"] = pd.to_numeric(df["Total Followers"], errors="coerce")
-        max_idx = df["Total Followers"].idxmax()
-        min_idx = df["Total Followers"].idxmin()
-        automated_insights.append(
-            f"The page with the highest followers is **{df.loc[max_idx, competitor_col]}** with **{df.loc[max_idx, 'Total Followers']}** followers, while **{df.loc[min_idx, competitor_col]}** has the lowest with **{df.loc[min_idx, 'Total Followers']}** followers."
-        )
-    # Check for "Total Posts" metric.
-    if "Total posts" in df.columns:
-        df["Total posts"] = pd.to_numeric(df["Total posts"], errors="coerce")
-        max_idx = df["Total posts"].idxmax()
-        min_idx = df["Total posts"].idxmin()
-        automated_insights.append(
-            f"The page with the highest posts is **{df.loc[max_idx, competitor_col]}** with **{df.loc[max_idx, 'Total posts']}** posts, while **{df.loc[min_idx, competitor_col]}** has the lowest with **{df.loc[min_idx, 'Total posts']}** posts."
-        )
-        
+    with stage("insights"):
+        automated_insights = insights.competitor_insights(df)
     if automated_insights:
         st.subheader("Insights")
         for insight in automated_insights:
             st.write(insight)
     else:
         st.info("No automated insights available as required metrics are missing.")
+
+    with stage("growth ranking"):
+        growth_ranking = insights.competitor_growth(df)
+    if growth_ranking is not None:
+        st.subheader("Follower Growth Ranking")
+        st.dataframe(growth_ranking)
     
         
     # Interactive Bar Graph for Competitors
@@ -126,33 +365,38 @@ if data_source == "Competitor Analytics":
     # Allow users to select competitors from the list.
     competitor_list = df[competitor_col].unique().tolist()
     default_competitors = ["Business Schools 4 Climate Leadership Africa", "Lagos Business School Sustainability Centre"]
+    # Other organisations' exports list other competitors.
+    default_competitors = [c for c in default_competitors if c in competitor_list] or competitor_list[:2]
     selected_competitors = st.multiselect("Select Competitors", competitor_list, default=default_competitors)
         
-    filtered_df = df[df[competitor_col].isin(selected_competitors)]
-    
-    # Compute the sorting order for competitors based on the first selected metric (descending).
-    sort_order = filtered_df.sort_values(by=selected_metrics[0], ascending=False)[competitor_col].tolist()
+    if not selected_metrics:
+        st.error("Please select at least one metric.")
+    else:
+        with stage("build chart"):
+            bar_chart = charts.competitor_bar_chart(df, selected_metrics, selected_competitors)
+        with stage("render chart"):
+            st.altair_chart(bar_chart, use_container_width=True)
 
-    # Reshape data from wide to long format for multiple metrics plotting.
-    plot_df = filtered_df.melt(id_vars=competitor_col, value_vars=selected_metrics, 
-                            var_name="Metric", value_name="Value")
-        
-    bar_chart = alt.Chart(plot_df).mark_bar().encode(
-        x=alt.X(f"{competitor_col}:N", title="Competitor", sort=sort_order,
-                axis=alt.Axis(
-                    labelAngle=0,    # Keep labels horizontal
-                    labelOverlap=True  # Let labels overlap or do 'greedy' to reduce collisions
-        )),
-        xOffset=alt.XOffset("Metric:N"),
-        y=alt.Y("Value:Q", title="Value"),
-        color=alt.Color("Metric:N", title="Metric"),
-        tooltip=[competitor_col, "Metric:N", "Value:Q"]
-    ).properties(
-        width=700,
-        height=400,
-        title="Metrics Comparison Across Competitors"
-    )
-    st.altair_chart(bar_chart, use_container_width=True)
+    # Trajectories and rank changes across every competitor export ingested so far.
+    with stage("history"):
+        history = sheets.history(sheet_name)
+    if history["Period end"].nunique() < 2:
+        st.info("Add competitor exports for other periods to see trends across periods.")
+    else:
+        st.subheader("Competitor Trends Across Periods")
+        history_metrics = insights.history_metrics(history)
+        trend_metric = st.selectbox("Trend Metric", history_metrics,
+                                    index=history_metrics.index(insights.FOLLOWER_GROWTH) if insights.FOLLOWER_GROWTH in history_metrics else 0)
+        with stage("trajectories"):
+            # Nothing to plot with no competitor selected (or none of them in the history).
+            selected_history = sheets.history(sheet_name, selected_competitors) if selected_competitors else None
+            trajectories = (insights.competitor_trajectories(selected_history, trend_metric)
+                            if selected_history is not None and not selected_history.empty else None)
+            rank_changes = insights.competitor_rank_changes(history, trend_metric)
+        if trajectories is not None and not trajectories.empty:
+            st.altair_chart(charts.competitor_trajectory_chart(trajectories, trend_metric), use_container_width=True)
+        st.subheader(f"Rank Changes by {trend_metric}")
+        st.dataframe(rank_changes)
 
 
 # -------------------------------
@@ -160,143 +404,86 @@ if data_source == "Competitor Analytics":
 # -------------------------------
 if data_source == "Followers":
     st.header("Followers Analytics")
-    # If the first row is all strings, assume it's a header.
-    if all(isinstance(x, str) for x in df.iloc[0]):
-        df.columns = df.iloc[0]
-        df = df[1:].reset_index(drop=True)
-    
-    # If there's no "Date" column, assume this is a non-time-series sheet.
-    if 'Date' not in df.columns:
-        # Convert columns with "total" in the heading to numeric.
-        for col in df.columns:
-            if "total" in str(col).lower():
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Time-series sheets are indexed by Date; anything else is a category breakdown.
+    if not isinstance(df.index, pd.DatetimeIndex):
         st.dataframe(df)
         
         # Automated Insights for non–time-series data.
-        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        total_metrics = [col for col in numeric_cols if "total" in col.lower()]
-        if total_metrics:
-            for col in total_metrics:
-                category_col = df.columns[0]  # Assume the first column holds the category.
-                max_idx = df[col].idxmax()
-                min_idx = df[col].idxmin()
-                max_cat = df.loc[max_idx, category_col]
-                min_cat = df.loc[min_idx, category_col]
-                max_val = df.loc[max_idx, col]
-                min_val = df.loc[min_idx, col]
-                if max_val == min_val:
-                    st.write(f"For **{col}**, all categories have the same value: **{max_val}**.")
-                else:
-                    st.write(f"For **{category_col}**, **{max_cat}** has the highest value (**{max_val}**) while **{min_cat}** has the lowest (**{min_val}**).")
+        with stage("insights"):
+            category_insights = insights.category_insights(df)
+        if category_insights:
+            for insight in category_insights:
+                st.write(insight)
         else:
             st.info("No numeric 'total' metrics available for automated insights.")
         
         
         # If numeric columns exist, allow a bar chart.
+        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
         if numeric_cols:
             selected_metric = st.selectbox("Select a Metric for Bar Chart", numeric_cols)
-            # Use the first column as the category, if available.
-            category_col = df.columns[0]
-            # Sort order
-            sort_order = df.sort_values(by=selected_metric, ascending=False)[category_col].tolist()
-
-            bar_chart = alt.Chart(df).mark_bar().encode(
-                x=alt.X(f"{category_col}:N", title=category_col, sort=sort_order),
-                y=alt.Y(f"{selected_metric}:Q", title=selected_metric),
-                tooltip=[category_col, selected_metric]
-            ).properties(
-                width=700,
-                height=400,
-                title=f"{selected_metric} by {category_col}"
-            )
-            st.altair_chart(bar_chart, use_container_width=True)
+            with stage("build chart"):
+                bar_chart = charts.category_bar_chart(df, selected_metric)
+            with stage("render chart"):
+                st.altair_chart(bar_chart, use_container_width=True)
         st.stop()
     
-    # Convert the Date column to datetime, the rest to numeric
-    try:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        
-        for col in df.columns:
-            if col != "Date":
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-    except Exception as e:
-        st.error("Data type onversion error: " + str(e))
-    
     # Date filters.
-    min_date = df['Date'].min()
-    max_date = df['Date'].max()
+    with stage("rollup"):
+        rollup = sheets.rollup(sheet_name)
+    min_date = rollup.min_date
+    max_date = rollup.max_date
     start_date_filter = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date)
     end_date_filter   = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date)
+    granularity = st.sidebar.selectbox("Granularity", list(rollups.GRANULARITIES), index=2)
     
     if start_date_filter > end_date_filter:
         st.error("Error: Start Date must be before End Date.")
     else:
-        mask = (df['Date'] >= pd.to_datetime(start_date_filter)) & (df['Date'] <= pd.to_datetime(end_date_filter))
-        filtered_df = df.loc[mask].copy()
         st.subheader(f"New Followers between {start_date_filter} & {end_date_filter}")
-        # st.dataframe(filtered_df)
         
-        # Aggregate data by month.
-        filtered_df['Date'] = filtered_df['Date'].dt.to_period('M').dt.to_timestamp()
-        monthly_agg = filtered_df.groupby('Date').sum(numeric_only=True).reset_index()
-        st.subheader("Monthly Aggregated Data")
-        st.dataframe(monthly_agg)
+        # Aggregate by the chosen granularity from the precomputed rollup.
+        with stage("aggregate"):
+            period_agg = rollup.query(start_date_filter, end_date_filter, granularity)
+        st.subheader(f"{granularity} Aggregated Data")
+        st.dataframe(period_agg)
         
         # Automated Summary for metrics with "total" in the header.
-        # Find all numeric columns (other than 'Date') with "total" in their header.
-        total_metrics = [
-            col for col in monthly_agg.columns
-            if col != "Date" and "total" in str(col).lower() and pd.api.types.is_numeric_dtype(monthly_agg[col])
-        ]
-
-        if total_metrics and len(monthly_agg) >= 2:
-            for col in total_metrics:
-                current_val = monthly_agg.iloc[-1][col]
-                previous_val = monthly_agg.iloc[-2][col]
-                if previous_val != 0:
-                    pct_change = ((current_val - previous_val) / previous_val) * 100
-                    current_month = monthly_agg.iloc[-1]['Date'].strftime('%b')
-                    previous_month = monthly_agg.iloc[-2]['Date'].strftime('%b')
-                    if pct_change > 0:
-                        st.write(f"Great job! You gained {pct_change:.1f}% more {col} in {current_month} compared to {previous_month}.")
-                    elif pct_change < 0:
-                        st.write(f"A {abs(pct_change):.1f}% loss in {col} in {current_month} compared to {previous_month}.")
-                    else:
-                        st.write(f"There was no change in {col} from {previous_month} to {current_month}.")
-                else:
-                    st.write(f"No previous data to compare for {col}.")
+        with stage("insights"):
+            period_insights = insights.period_change_insights(period_agg, granularity, insights.TOTAL_MARKERS[ingest.FOLLOWERS])
+        if period_insights:
+            for insight in period_insights:
+                st.write(insight)
         else:
-            st.info("Not enough monthly data or no 'total' metrics available for summary.")
+            st.info(f"Not enough {granularity.lower()} data or no 'total' metrics available for summary.")
+
+        # Change, year-over-year, rolling average and growth rank of every metric.
+        trend_metrics = [col for col in period_agg.columns if col != "Date"]
+        if trend_metrics and len(period_agg):
+            st.subheader("Metric Trends")
+            with stage("trends"):
+                trends = insights.metric_trends(period_agg, trend_metrics)
+            st.dataframe(trends)
 
         
         # Exclude the Date column to get metric columns.
-        metric_options = [col for col in monthly_agg.columns if col != "Date"]
+        metric_options = [col for col in period_agg.columns if col != "Date"]
         if not metric_options:
             st.error("No metric columns available for plotting.")
         else:
             # Allow the user to select one or more metrics.
-            selected_metrics = st.multiselect("Select Metrics to Plot", metric_options, default=metric_options)
+            default_metrics = charts.default_metrics(ingest.FOLLOWERS, metric_options)
+            selected_metrics = st.multiselect("Select Metrics to Plot", metric_options, default=default_metrics)
             if not selected_metrics:
                 st.error("Please select at least one metric.")
             else:
-                # Convert the DataFrame from wide to long format.
-                plot_df = monthly_agg.melt(id_vars=['Date'], value_vars=selected_metrics, 
-                                    var_name='Metric', value_name='Value')
-                # Create an interval selection for zooming.
-                zoom = alt.selection_interval(bind='scales', encodings=['x'])
-                line_chart = alt.Chart(plot_df).mark_line(point=True).encode(
-                    x=alt.X('Date:T', title="Date"),
-                    y=alt.Y('Value:Q', title="Value"),
-                    color=alt.Color('Metric:N', title="Metric"),
-                    tooltip=['Date:T', 'Metric:N', 'Value:Q']
-                ).properties(
-                    width=700,
-                    height=400,
-                    title="Metrics Over Time"
-                ).add_selection(zoom)
-                st.altair_chart(line_chart, use_container_width=True)
+                with stage("build chart"):
+                    line_chart = charts.metrics_line_chart(period_agg, selected_metrics)
+                with stage("render chart"):
+                    st.altair_chart(line_chart, use_container_width=True)
+
+            # When in the week (and day, for hourly exports) the page is busiest.
+            show_activity_patterns(sheets.calendar(sheet_name), metric_options, start_date_filter, end_date_filter)
 
 
 # -------------------------------
@@ -304,34 +491,16 @@ if data_source == "Followers":
 # -------------------------------
 if data_source == "Visitors":
     st.header("Visitors Analytics")
-    if all(isinstance(x, str) for x in df.iloc[0]):
-        df.columns = df.iloc[0]
-        df = df[1:].reset_index(drop=True)
-    
-    # If there's no "Date" column, assume this is a non-time-series sheet.
-    if 'Date' not in df.columns:
-        # Convert columns with "total" in the heading to numeric.
-        for col in df.columns:
-            if "total" in str(col).lower():
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Time-series sheets are indexed by Date; anything else is a category breakdown.
+    if not isinstance(df.index, pd.DatetimeIndex):
         st.dataframe(df)
         
         # Automated Insights for non–time-series data.
-        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        total_metrics = [col for col in numeric_cols if "total" in col.lower()]
-        if total_metrics:
-            for col in total_metrics:
-                category_col = df.columns[0]  # Assume the first column holds the category.
-                max_idx = df[col].idxmax()
-                min_idx = df[col].idxmin()
-                max_cat = df.loc[max_idx, category_col]
-                min_cat = df.loc[min_idx, category_col]
-                max_val = df.loc[max_idx, col]
-                min_val = df.loc[min_idx, col]
-                if max_val == min_val:
-                    st.write(f"For **{col}**, all categories have the same value: **{max_val}**.")
-                else:
-                    st.write(f"For **{category_col}**, **{max_cat}** has the highest value (**{max_val}**) while **{min_cat}** has the lowest (**{min_val}**).")
+        with stage("insights"):
+            category_insights = insights.category_insights(df)
+        if category_insights:
+            for insight in category_insights:
+                st.write(insight)
         else:
             st.info("No numeric 'total' metrics available for automated insights.")
         
@@ -340,103 +509,104 @@ if data_source == "Visitors":
         
         if numeric_cols:
             selected_metric = st.selectbox("Select a Metric for Bar Chart", numeric_cols)
-            # Use the first column as the category, if available.
-            category_col = df.columns[0]
-            sort_order = df.sort_values(by=selected_metric, ascending=False)[category_col].tolist()
-            bar_chart = alt.Chart(df).mark_bar().encode(
-                x=alt.X(f"{category_col}:N", title=category_col, sort=sort_order),
-                y=alt.Y(f"{selected_metric}:Q", title=selected_metric),
-                tooltip=[category_col, selected_metric]
-            ).properties(
-                width=700,
-                height=400,
-                title=f"{selected_metric} by {category_col}"
-            )
-            st.altair_chart(bar_chart, use_container_width=True)
+            with stage("build chart"):
+                bar_chart = charts.category_bar_chart(df, selected_metric)
+            with stage("render chart"):
+                st.altair_chart(bar_chart, use_container_width=True)
         st.stop()
     
-    # Convert the Date column to datetime, the rest to numeric
-    try:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        
-        for col in df.columns:
-            if col != "Date":
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-    except Exception as e:
-        st.error("Data type onversion error: " + str(e))
-    
-    min_date = df['Date'].min()
-    max_date = df['Date'].max()
+    with stage("rollup"):
+        rollup = sheets.rollup(sheet_name)
+    min_date = rollup.min_date
+    max_date = rollup.max_date
     start_date_filter = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date, key="visitors_start")
     end_date_filter   = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date, key="visitors_end")
+    granularity = st.sidebar.selectbox("Granularity", list(rollups.GRANULARITIES), index=2, key="visitors_granularity")
     
     if start_date_filter > end_date_filter:
         st.error("Error: Start Date must be before End Date.")
     else:
-        mask = (df['Date'] >= pd.to_datetime(start_date_filter)) & (df['Date'] <= pd.to_datetime(end_date_filter))
-        filtered_df = df.loc[mask].copy()
         st.subheader("Filtered Data")
-        # st.dataframe(filtered_df)
         
-        # Aggregate data by month.
-        filtered_df['Date'] = filtered_df['Date'].dt.to_period('M').dt.to_timestamp()
-        monthly_agg = filtered_df.groupby('Date').sum(numeric_only=True).reset_index()
-        st.subheader("Monthly Aggregated Data")
-        st.dataframe(monthly_agg)
+        # Aggregate by the chosen granularity from the precomputed rollup.
+        with stage("aggregate"):
+            period_agg = rollup.query(start_date_filter, end_date_filter, granularity)
+        st.subheader(f"{granularity} Aggregated Data")
+        st.dataframe(period_agg)
         
-        # Automated Summary for metrics with "total" in the header.
-        # Find all numeric columns (other than 'Date') with "total" in their header.
-        total_metrics = [
-            col for col in monthly_agg.columns
-            if col != "Date" and "(total)" in str(col).lower() and pd.api.types.is_numeric_dtype(monthly_agg[col])
-        ]
-
-        if total_metrics and len(monthly_agg) >= 2:
-            for col in total_metrics:
-                current_val = monthly_agg.iloc[-1][col]
-                previous_val = monthly_agg.iloc[-2][col]
-                if previous_val != 0:
-                    pct_change = ((current_val - previous_val) / previous_val) * 100
-                    current_month = monthly_agg.iloc[-1]['Date'].strftime('%b')
-                    previous_month = monthly_agg.iloc[-2]['Date'].strftime('%b')
-                    if pct_change > 0:
-                        st.write(f"Great job! You gained {pct_change:.1f}% more {col} in {current_month} compared to {previous_month}.")
-                    elif pct_change < 0:
-                        st.write(f"A {abs(pct_change):.1f}% loss in {col} in {current_month} compared to {previous_month}.")
-                    else:
-                        st.write(f"There was no change in {col} from {previous_month} to {current_month}.")
-                else:
-                    st.write(f"No previous data to compare for {col}.")
+        # Automated Summary for metrics with "(total)" in the header.
+        with stage("insights"):
+            period_insights = insights.period_change_insights(period_agg, granularity, insights.TOTAL_MARKERS[ingest.VISITORS])
+        if period_insights:
+            for insight in period_insights:
+                st.write(insight)
         else:
-            st.info("Not enough monthly data or no 'total' metrics available for summary.")
+            st.info(f"Not enough {granularity.lower()} data or no 'total' metrics available for summary.")
+
+        # Change, year-over-year, rolling average and growth rank of every metric.
+        trend_metrics = [col for col in period_agg.columns if col != "Date"]
+        if trend_metrics and len(period_agg):
+            st.subheader("Metric Trends")
+            with stage("trends"):
+                trends = insights.metric_trends(period_agg, trend_metrics)
+            st.dataframe(trends)
         
         # Chart the data in a line chart with zooming functionality.
-        agg_df = filtered_df.copy().sort_values("Date")
         # Exclude the Date column to get metric columns.
-        metric_options = [col for col in monthly_agg.columns if col != "Date"]
+        metric_options = [col for col in period_agg.columns if col != "Date"]
         if not metric_options:
             st.error("No metric columns available for plotting.")
         else:
             # Allow the user to select one or more metrics.
-            default_metrics = ["Total page views (total)", "Total unique visitors (total)", "Overview page views (total)"]
+            default_metrics = charts.default_metrics(ingest.VISITORS, metric_options)
             selected_metrics = st.multiselect("Select Metrics to Plot", metric_options, default=default_metrics)
             if not selected_metrics:
                 st.error("Please select at least one metric.")
             else:
-                # Convert the DataFrame from wide to long format.
-                plot_df = monthly_agg.melt(id_vars=['Date'], value_vars=selected_metrics, 
-                                    var_name='Metric', value_name='Value')
-                # Create an interval selection for zooming.
-                zoom = alt.selection_interval(bind='scales', encodings=['x'])
-                line_chart = alt.Chart(plot_df).mark_line(point=True).encode(
-                    x=alt.X('Date:T', title="Date"),
-                    y=alt.Y('Value:Q', title="Value"),
-                    color=alt.Color('Metric:N', title="Metric"),
-                    tooltip=['Date:T', 'Metric:N', 'Value:Q']
-                ).properties(
-                    width=700,
-                    height=400,
-                    title="Metrics Over Time"
-                ).add_selection(zoom)
-                st.altair_chart(line_chart, use_container_width=True)
+                with stage("build chart"):
+                    line_chart = charts.metrics_line_chart(period_agg, selected_metrics)
+                with stage("render chart"):
+                    st.altair_chart(line_chart, use_container_width=True)
+
+            # When in the week (and day, for hourly exports) the page is busiest.
+            show_activity_patterns(sheets.calendar(sheet_name), metric_options, start_date_filter, end_date_filter)
+
+
+# -------------------------------
+# Posts Analytics
+# -------------------------------
+if data_source == "Posts":
+    st.header("Post Engagement")
+    post_exports = posts.find_post_exports(EXPORTS_DIR, page)
+    if not post_exports:
+        st.info(f"No content exports (*{posts.POST_MARKER}*.xlsx) found for {page_title(page)} in '{EXPORTS_DIR}'")
+        st.stop()
+
+    # Ranked once per set of exports; changing the metric or count only reads the heaps.
+    try:
+        with stage("rank posts"):
+            ranking = _rank_posts(tuple((path, *ingest.file_signature(path)) for path in post_exports),
+                                  DB_PATH, revision, page)
+    except Exception as e:
+        st.error(f"Error loading posts: {e}")
+        st.stop()
+    if not ranking.metrics:
+        st.error("The content exports have no likes, comments, reposts, clicks or impressions to rank.")
+        st.stop()
+
+    summary = ranking.summary()
+    st.write(f"**{summary['Posts']}** posts in {len(post_exports)} export(s).")
+    if posts.FOLLOWER_ENGAGEMENT not in ranking.metrics:
+        st.info("Add a followers export to rank posts by engagement relative to followers.")
+    st.dataframe(pd.Series(summary, name="Value").iloc[1:])
+
+    rank_metric = st.sidebar.selectbox("Rank Posts By", ranking.metrics)
+    top_k = st.sidebar.slider("Posts to Show", 5, posts.MAX_K, 10)
+    with stage("top posts"):
+        top_posts = ranking.top(rank_metric, top_k)
+    st.subheader(f"Top {len(top_posts)} Posts by {rank_metric}")
+    st.dataframe(top_posts, column_config={"Post link": st.column_config.LinkColumn("Post link")})
+    with stage("build chart"):
+        bar_chart = charts.post_ranking_chart(top_posts, rank_metric)
+    with stage("render chart"):
+        st.altair_chart(bar_chart, use_container_width=True)
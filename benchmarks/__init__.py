@@ -0,0 +1 @@
+"""Performance benchmarks for the dashboard's data paths (run ``python -m benchmarks.bench``)."""
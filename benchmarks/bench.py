@@ -0,0 +1,206 @@
+"""Headless benchmark of the dashboard's data paths on synthetic exports.
+
+For each size (years of daily rows x number of competitors) it generates
+exports with ``benchmarks.synthetic`` and times, with wall time and peak
+Python-allocated memory (tracemalloc):
+
+* parse_xlsx       -- openpyxl parse of every sheet (the cold load)
+* normalize        -- header detection and typing of every sheet
+* columnar_write   -- first ``ingest.load_sheet`` (parse + normalize + Parquet)
+* columnar_read    -- warm ``ingest.load_sheet`` from the Parquet copies
+* store_ingest     -- appending the three exports to a fresh metrics store
+* rollup_build     -- prefix-sum rollups of the time-series sheets
+* date_filter      -- a Date-index slice of a random range
+* monthly_agg      -- Monthly rollup queries of random ranges
+* chart_specs      -- building the default line/bar chart specs as dicts
+* post_ranking     -- streaming top-K ranking of a content export of ``--posts`` posts
+
+    python -m benchmarks.bench [--years 1 10] [--competitors 50 2000] [--posts 20000]
+                               [--json results.json] [--compare baseline.json]
+
+Each stage is timed as the best of ``--repeats`` runs. With ``--compare``, any
+stage more than ``--tolerance`` times and more than ``--min-delta`` seconds
+slower than the baseline is reported and the exit status is 1, so it can gate
+a deploy without tripping on noise in millisecond-scale stages.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from bs4cl import charts, ingest, posts, rollups, store
+
+QUERIES = 50
+# Timed runs per stage; the fastest counts.
+REPEATS = 3
+# Slowdowns smaller than this many seconds are never reported as regressions.
+MIN_REGRESSION_SECONDS = 0.05
+
+
+class Timer:
+    """Collects (stage -> seconds, peak bytes) for one benchmark case.
+
+    Each stage runs once under tracemalloc for its peak memory, then
+    ``repeats`` more times untraced; the fastest untraced run is its time.
+    ``setup``, if given, runs before every run (e.g. to undo a cache write).
+    """
+
+    def __init__(self, repeats=REPEATS):
+        self.repeats = repeats
+        self.results = {}
+
+    def run(self, stage, func, *args, setup=None):
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            result = func(*args)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        best = float("inf")
+        for _ in range(self.repeats):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+        self.results[stage] = {"seconds": best, "peak_mb": peak / 2**20}
+        return result
+
+
+def _parse_all(paths):
+    return {
+        path: {sheet: pd.read_excel(path, sheet_name=sheet, header=None) for sheet in ingest.read_sheet_names(path)}
+        for path in paths
+    }
+
+
+def _normalize_all(raw):
+    return {
+        (path, sheet): ingest.normalize_sheet(df, ingest.export_kind(path))
+        for path, sheets in raw.items() for sheet, df in sheets.items()
+    }
+
+
+def _load_all(paths):
+    return {
+        (path, sheet): ingest.load_sheet(path, sheet)
+        for path in paths for sheet in ingest.read_sheet_names(path)
+    }
+
+
+def _random_ranges(rollup, rng):
+    days = rollup.days
+    picks = np.sort(rng.integers(0, len(days), (QUERIES, 2)), axis=1)
+    return [(days[i], days[j]) for i, j in picks]
+
+
+def _remove_columnar(paths):
+    for path in paths:
+        shutil.rmtree(os.path.dirname(ingest.columnar_path(path, "")), ignore_errors=True)
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def run_case(years, competitors, workdir, post_count=0, repeats=REPEATS):
+    paths = synthetic.write_exports(workdir, years=years, competitors=competitors, posts=post_count)
+    export_paths = [paths[kind] for kind in (ingest.COMPETITOR, ingest.VISITORS, ingest.FOLLOWERS)]
+    timer = Timer(repeats)
+    rng = np.random.default_rng(1)
+
+    raw = timer.run("parse_xlsx", _parse_all, export_paths)
+    timer.run("normalize", _normalize_all, raw)
+    timer.run("columnar_write", _load_all, export_paths, setup=lambda: _remove_columnar(export_paths))
+    frames = timer.run("columnar_read", _load_all, export_paths)
+    db_path = f"{workdir}/bench.sqlite"
+    timer.run("store_ingest", lambda: store.MetricsStore(db_path).ingest_many(export_paths, 1),
+              setup=lambda: _remove_file(db_path))
+
+    series = {key: df for key, df in frames.items() if isinstance(df.index, pd.DatetimeIndex)}
+    built = timer.run("rollup_build", lambda: {key: rollups.Rollup(df) for key, df in series.items()})
+    ranges = {key: _random_ranges(rollup, rng) for key, rollup in built.items()}
+    timer.run("date_filter", lambda: [
+        series[key].loc[start:end] for key, spans in ranges.items() for start, end in spans
+    ])
+    timer.run("monthly_agg", lambda: [
+        built[key].query(start, end, "Monthly") for key, spans in ranges.items() for start, end in spans
+    ])
+
+    def chart_specs():
+        specs = []
+        for key, rollup in built.items():
+            period_agg = rollup.query(rollup.min_date, rollup.max_date, "Daily")
+            metrics = [col for col in period_agg.columns if col != "Date"]
+            specs.append(charts.metrics_line_chart(period_agg, metrics).to_dict())
+        competitor_df = frames[(paths["competitor"], "COMPETITORS")]
+        specs.append(charts.competitor_bar_chart(
+            competitor_df, competitor_df.columns[1:3].tolist(), competitor_df.iloc[:, 0].tolist()).to_dict())
+        return specs
+    timer.run("chart_specs", chart_specs)
+
+    if post_count:
+        new_followers = frames[(paths["followers"], "New followers")]["Total followers"]
+        followers = posts.follower_counts(new_followers, current_total=153)
+        timer.run("post_ranking", lambda: posts.rank_posts([paths["posts"]], followers).top(posts.TOTAL_ENGAGEMENT))
+    return timer.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data paths on synthetic exports.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 10], help="years of daily rows")
+    parser.add_argument("--competitors", type=int, nargs="+", default=[50, 2000], help="competitor rows")
+    parser.add_argument("--posts", type=int, default=20000, help="posts in the content export (0 to skip)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown vs the baseline")
+    parser.add_argument("--min-delta", type=float, default=MIN_REGRESSION_SECONDS,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per stage (the fastest counts)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for years in args.years:
+        for competitors in args.competitors:
+            case = f"{years:g}y-{competitors}c"
+            with tempfile.TemporaryDirectory() as workdir:
+                results[case] = run_case(years, competitors, workdir, args.posts, args.repeats)
+            print(f"\n{case}")
+            for stage, r in results[case].items():
+                print(f"  {stage:<15} {r['seconds'] * 1000:10.1f} ms  {r['peak_mb']:8.1f} MB peak")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        regressions = [
+            f"{case}/{stage}: {r['seconds']:.3f}s vs {baseline[case][stage]['seconds']:.3f}s"
+            for case, stages in results.items() if case in baseline
+            for stage, r in stages.items() if stage in baseline[case]
+            and r["seconds"] > args.tolerance * baseline[case][stage]["seconds"]
+            and r["seconds"] - baseline[case][stage]["seconds"] > args.min_delta
+        ]
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
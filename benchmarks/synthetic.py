@@ -0,0 +1,132 @@
+"""Synthetic LinkedIn exports with the same layout as the real ones.
+
+* competitor analytics: a (start date, end date) row, then a header row
+  (Page, Total Followers, New Followers, Total post engagements, Total posts)
+  and one row per competitor;
+* visitors: a daily "Visitor metrics" sheet with desktop/mobile/"(total)"
+  columns, plus Location, Job function, Seniority, Industry and Company size
+  breakdowns of "Total views";
+* followers: a daily "New followers" sheet plus the same breakdowns of
+  "Total followers";
+* content (posts): a description row, then a header row and one row per post
+  with its impressions, clicks, likes, comments and reposts.
+
+Dates are written as MM/DD/YYYY strings, as LinkedIn does. Files are named
+like real exports so ``bs4cl.ingest`` recognises their kind and page.
+"""
+
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+VISITOR_SECTIONS = ["Overview", "Life", "Jobs", "Total"]
+FOLLOWER_COLUMNS = ["Sponsored followers", "Organic followers", "Auto-invited followers", "Total followers"]
+BREAKDOWNS = {
+    "Location": "Region",
+    "Job function": "Function",
+    "Seniority": "Level",
+    "Industry": "Industry",
+    "Company size": "Size",
+}
+
+
+def _write(path, sheets):
+    """Write {sheet name: list of rows} with openpyxl's streaming writer."""
+    wb = openpyxl.Workbook(write_only=True)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def _dates(years, end="2025-02-10"):
+    days = pd.date_range(end=end, periods=int(365 * years), freq="D")
+    return days, days.strftime("%m/%d/%Y").tolist()
+
+
+def _breakdowns(rng, metric, categories):
+    sheets = {}
+    for sheet, prefix in BREAKDOWNS.items():
+        counts = rng.integers(1, 500, categories).tolist()
+        sheets[sheet] = [[sheet, metric]] + [[f"{prefix} {i}", c] for i, c in enumerate(counts)]
+    return sheets
+
+
+def write_visitors(path, years, rng, categories=50):
+    days, labels = _dates(years)
+    header = ["Date"]
+    for section in VISITOR_SECTIONS:
+        for measure in ("page views", "unique visitors"):
+            header += [f"{section} {measure} ({device})" for device in ("desktop", "mobile", "total")]
+    desktop = rng.poisson(3, (len(days), len(header) // 3))
+    mobile = rng.poisson(2, (len(days), len(header) // 3))
+    rows = [header]
+    for i, label in enumerate(labels):
+        row = [label]
+        for j in range(desktop.shape[1]):
+            row += [int(desktop[i, j]), int(mobile[i, j]), int(desktop[i, j] + mobile[i, j])]
+        rows.append(row)
+    _write(path, {"Visitor metrics": rows, **_breakdowns(rng, "Total views", categories)})
+
+
+def write_followers(path, years, rng, categories=50):
+    days, labels = _dates(years)
+    parts = rng.poisson([0.2, 2, 0.5], (len(days), 3))
+    rows = [["Date"] + FOLLOWER_COLUMNS]
+    rows += [[label, *map(int, part), int(part.sum())] for label, part in zip(labels, parts)]
+    _write(path, {"New followers": rows, **_breakdowns(rng, "Total followers", categories)})
+
+
+def write_competitors(path, competitors, rng, page_title):
+    total = rng.integers(100, 500_000, competitors)
+    new = (total * rng.uniform(0.05, 0.6, competitors)).astype(int)
+    rows = [["2/12/2024", "2/10/2025"],
+            ["Page", "Total Followers", "New Followers", "Total post engagements", "Total posts"]]
+    rows.append([page_title, 153, 153, 1200, 14])
+    rows += [
+        [f"Competitor {i}", int(t), int(n), int(rng.integers(0, 50_000)), int(rng.integers(0, 400))]
+        for i, (t, n) in enumerate(zip(total, new))
+    ]
+    _write(path, {"COMPETITORS": rows})
+
+
+def write_posts(path, posts, rng, end="2025-02-10"):
+    created = pd.Timestamp(end) - pd.to_timedelta(rng.integers(0, 365, posts), unit="D")
+    impressions = rng.integers(50, 20_000, posts)
+    rows = [["All posts data for the selected period"],
+            ["Post title", "Post link", "Post type", "Created date", "Impressions", "Clicks",
+             "Likes", "Comments", "Reposts", "Engagement rate"]]
+    for i in range(posts):
+        likes, comments, reposts = rng.poisson(impressions[i] * np.array([0.02, 0.003, 0.002]))
+        clicks = int(rng.poisson(impressions[i] * 0.01))
+        rows.append([
+            f"Post {i}", f"https://www.linkedin.com/feed/update/urn:li:activity:{7_000_000 + i}",
+            "Organic", created[i].strftime("%m/%d/%Y"), int(impressions[i]), clicks,
+            int(likes), int(comments), int(reposts),
+            round((clicks + likes + comments + reposts) / impressions[i], 4),
+        ])
+    _write(path, {"All posts": rows})
+
+
+def write_exports(directory, years=1, competitors=50, categories=50,
+                  page_title="Synthetic Climate School", seed=0, posts=0):
+    """Write one competitor, visitors and followers export (and a content export
+    of ``posts`` posts, if any); returns their paths by kind."""
+    rng = np.random.default_rng(seed)
+    slug = page_title.lower().replace(" ", "-")
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "competitor": os.path.join(directory, f"{page_title}_competitor_analytics_1739343948666.xlsx"),
+        "visitors": os.path.join(directory, f"{slug}_visitors_1739343988681.xlsx"),
+        "followers": os.path.join(directory, f"{slug}_followers_1739343974503.xlsx"),
+    }
+    write_competitors(paths["competitor"], competitors, rng, page_title)
+    write_visitors(paths["visitors"], years, rng, categories)
+    write_followers(paths["followers"], years, rng, categories)
+    if posts:
+        paths["posts"] = os.path.join(directory, f"{slug}_content_1739344001234.xlsx")
+        write_posts(paths["posts"], posts, rng)
+    return paths
@@ -0,0 +1,5 @@
+"""Data layer for the BS4CL LinkedIn analytics dashboard.
+
+Everything in this package is free of Streamlit so it can be used from the
+command line as well as from ``BS4CL_LinkedInAnalyses.py``.
+"""
@@ -0,0 +1,224 @@
+"""Altair chart builders shared by the dashboard and the batch reports.
+
+Chart data is reduced on the server before it is embedded in the Vega-Lite
+spec, so the payload sent to the browser is bounded by the chart size rather
+than by the data:
+
+* time series are min/max bucketed to at most ``width`` points per metric,
+  and ``MAX_CHART_POINTS`` in total, keeping each bucket's extremes so peaks
+  and dips survive;
+* category bars show the top ``TOP_N`` categories plus one "Other" bar;
+* calendar heatmaps keep the most recent ``MAX_CHART_POINTS`` cells;
+* the long (Date, Metric, Value) frames Altair needs are assembled from the
+  reduced NumPy arrays instead of melting the full wide frame.
+"""
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from bs4cl import ingest, rollups
+
+# Metrics plotted when a view opens, per export kind (all metrics otherwise).
+DEFAULT_METRICS = {
+    ingest.VISITORS: ["Total page views (total)", "Total unique visitors (total)", "Overview page views (total)"],
+}
+
+CHART_WIDTH = 700
+CHART_HEIGHT = 400
+# Altair refuses to embed more rows than this by default.
+MAX_CHART_POINTS = 5000
+# Bars drawn per category chart; the remaining categories are summed into OTHER_LABEL.
+TOP_N = 20
+OTHER_LABEL = "Other"
+
+
+def default_metrics(kind, metric_options):
+    """The kind's default metrics that this sheet actually has."""
+    return [m for m in DEFAULT_METRICS.get(kind, metric_options) if m in metric_options]
+
+
+def minmax_positions(values, max_points):
+    """Row positions to plot for each column of a (rows x metrics) array.
+
+    Rows are split into ``max_points // 2`` equal buckets and each bucket keeps
+    the positions of its minimum and maximum, for all columns in one pass.
+    Returns a list with one sorted position array per column.
+    """
+    n, k = values.shape
+    if n <= max_points:
+        return [np.arange(n)] * k
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    padded = np.full((buckets * size, k), np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size, k)
+    lows = np.where(np.isnan(blocks), np.inf, blocks).argmin(axis=1)
+    highs = np.where(np.isnan(blocks), -np.inf, blocks).argmax(axis=1)
+    base = (np.arange(buckets) * size)[:, None]
+    positions = np.minimum(np.vstack([base + lows, base + highs]), n - 1)
+    return [np.unique(positions[:, j]) for j in range(k)]
+
+
+def downsample_series(period_agg, selected_metrics, max_points=CHART_WIDTH):
+    """Long (Date, Metric, Value) frame of the selected metrics, min/max bucketed."""
+    dates = period_agg["Date"].to_numpy()
+    values = period_agg[selected_metrics].to_numpy(dtype="float64", na_value=np.nan)
+    positions = minmax_positions(values, max_points)
+    return pd.DataFrame({
+        "Date": np.concatenate([dates[p] for p in positions]),
+        "Metric": np.repeat(selected_metrics, [len(p) for p in positions]),
+        "Value": np.concatenate([values[p, j] for j, p in enumerate(positions)]),
+    })
+
+
+def top_n_with_other(df, label_col, metrics, top_n=TOP_N):
+    """The ``top_n`` rows by the first metric, largest first, plus an "Other" row summing the rest."""
+    values = df[metrics].to_numpy(dtype="float64", na_value=np.nan)
+    order = np.argsort(-np.where(np.isnan(values[:, 0]), -np.inf, values[:, 0]), kind="stable")
+    labels = df[label_col].astype(str).to_numpy()[order]
+    values = values[order]
+    if len(order) > top_n:
+        labels = np.append(labels[:top_n], OTHER_LABEL)
+        values = np.vstack([values[:top_n], np.nansum(values[top_n:], axis=0)])
+    reduced = pd.DataFrame(values, columns=metrics)
+    reduced.insert(0, label_col, labels)
+    return reduced
+
+
+def _long_bars(reduced, label_col, metrics):
+    """Long (label, Metric, Value) frame from a reduced wide frame."""
+    n = len(reduced)
+    return pd.DataFrame({
+        label_col: np.tile(reduced[label_col].to_numpy(), len(metrics)),
+        "Metric": np.repeat(metrics, n),
+        "Value": reduced[metrics].to_numpy(dtype="float64", na_value=np.nan).ravel(order="F"),
+    })
+
+
+def competitor_bar_chart(df, selected_metrics, selected_competitors, top_n=TOP_N):
+    """Grouped bars of the selected metrics for the selected competitors."""
+    # Assume the first column holds competitor names.
+    competitor_col = df.columns[0]
+    filtered_df = df[df[competitor_col].isin(selected_competitors)]
+
+    # Competitors sorted by the first selected metric (descending), capped at top_n.
+    reduced = top_n_with_other(filtered_df, competitor_col, selected_metrics, top_n)
+    sort_order = reduced[competitor_col].tolist()
+    plot_df = _long_bars(reduced, competitor_col, selected_metrics)
+
+    return alt.Chart(plot_df).mark_bar().encode(
+        x=alt.X(f"{competitor_col}:N", title="Competitor", sort=sort_order,
+                axis=alt.Axis(
+                    labelAngle=0,    # Keep labels horizontal
+                    labelOverlap=True  # Let labels overlap or do 'greedy' to reduce collisions
+        )),
+        xOffset=alt.XOffset("Metric:N"),
+        y=alt.Y("Value:Q", title="Value"),
+        color=alt.Color("Metric:N", title="Metric"),
+        tooltip=[competitor_col, "Metric:N", "Value:Q"]
+    ).properties(
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT,
+        title="Metrics Comparison Across Competitors"
+    )
+
+
+def category_bar_chart(df, selected_metric, top_n=TOP_N):
+    """Bars of one metric per category of a breakdown sheet, largest first."""
+    # Use the first column as the category.
+    category_col = df.columns[0]
+    reduced = top_n_with_other(df, category_col, [selected_metric], top_n)
+    sort_order = reduced[category_col].tolist()
+    return alt.Chart(reduced).mark_bar().encode(
+        x=alt.X(f"{category_col}:N", title=category_col, sort=sort_order),
+        y=alt.Y(f"{selected_metric}:Q", title=selected_metric),
+        tooltip=[category_col, selected_metric]
+    ).properties(
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT,
+        title=f"{selected_metric} by {category_col}"
+    )
+
+
+def metrics_line_chart(period_agg, selected_metrics, max_points=CHART_WIDTH):
+    """Zoomable line chart of the selected metrics over a rollup query's periods."""
+    # Share the total point budget between metrics, but never below two points each.
+    max_points = max(min(max_points, MAX_CHART_POINTS // max(len(selected_metrics), 1)), 2)
+    plot_df = downsample_series(period_agg, selected_metrics, max_points)
+    # Create an interval selection for zooming.
+    zoom = alt.selection_interval(bind="scales", encodings=["x"])
+    return alt.Chart(plot_df).mark_line(point=True).encode(
+        x=alt.X("Date:T", title="Date"),
+        y=alt.Y("Value:Q", title="Value"),
+        color=alt.Color("Metric:N", title="Metric"),
+        tooltip=["Date:T", "Metric:N", "Value:Q"]
+    ).properties(
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT,
+        title="Metrics Over Time"
+    ).add_selection(zoom)
+
+
+def calendar_heatmap(cells, x, y, metric, title):
+    """Heatmap of a calendar index's long (x, y, Value) cells, e.g. Week x Weekday."""
+    cells = cells.tail(MAX_CHART_POINTS)
+    x_encoding = (alt.X(f"yearmonthdate({x}):O", title=f"{x} starting", axis=alt.Axis(labelOverlap=True))
+                  if x == "Week" else alt.X(f"{x}:O", title=x))
+    return alt.Chart(cells).mark_rect().encode(
+        x=x_encoding,
+        y=alt.Y(f"{y}:O", title=y, sort=rollups.WEEKDAYS if y == "Weekday" else "ascending"),
+        color=alt.Color("Value:Q", title=metric, scale=alt.Scale(scheme="blues")),
+        tooltip=[alt.Tooltip(f"{x}:{'T' if x == 'Week' else 'O'}"), f"{y}:O", "Value:Q"]
+    ).properties(
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT // 2,
+        title=title
+    )
+
+
+def seasonality_bar_chart(breakdown, metric):
+    """Average of a metric per weekday or month, from ``CalendarIndex.seasonality``."""
+    label_col = breakdown.columns[0]
+    return alt.Chart(breakdown).mark_bar().encode(
+        x=alt.X(f"{label_col}:N", title=label_col, sort=breakdown[label_col].tolist()),
+        y=alt.Y("Average:Q", title=f"Average {metric}"),
+        tooltip=[f"{label_col}:N", "Average:Q", "Share %:Q"]
+    ).properties(
+        width=CHART_WIDTH // 2,
+        height=CHART_HEIGHT // 2,
+        title=f"{metric} by {label_col}"
+    )
+
+
+def competitor_trajectory_chart(trajectories, metric):
+    """Lines of one metric per competitor across export periods."""
+    competitor_col = trajectories.columns[0]
+    return alt.Chart(trajectories).mark_line(point=True).encode(
+        x=alt.X("Period end:T", title="Export period ending"),
+        y=alt.Y("Value:Q", title=metric),
+        color=alt.Color(f"{competitor_col}:N", title="Competitor"),
+        tooltip=[f"{competitor_col}:N", "Period end:T", "Value:Q"]
+    ).properties(
+        width=CHART_WIDTH,
+        height=CHART_HEIGHT,
+        title=f"{metric} Across Export Periods"
+    )
+
+
+def post_ranking_chart(top, metric, title_chars=60):
+    """Horizontal bars of the ranked posts' ``metric``, best at the top."""
+    labels = [
+        f"{rank}. {str(title)[:title_chars]}"
+        for rank, title in zip(top.index, top.get("Post title", top.index.astype(str)))
+    ]
+    plot_df = pd.DataFrame({"Post": labels, "Value": top[metric].to_numpy(dtype="float64")})
+    return alt.Chart(plot_df).mark_bar().encode(
+        x=alt.X("Value:Q", title=metric),
+        y=alt.Y("Post:N", title=None, sort=labels),
+        tooltip=["Post:N", "Value:Q"]
+    ).properties(
+        width=CHART_WIDTH,
+        height=max(CHART_HEIGHT // 2, 20 * len(plot_df)),
+        title=f"Top Posts by {metric}"
+    )
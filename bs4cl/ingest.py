@@ -0,0 +1,266 @@
+"""Columnar ingest cache for LinkedIn XLSX exports.
+
+Each sheet of an export is parsed with openpyxl once, normalized (see
+``normalize_sheet``) and written as a Parquet file in a hidden directory next
+to the workbook::
+
+    .<workbook name>.columnar/<sheet>.parquet
+
+The Parquet footer records the sha256 of the workbook it was built from, so a
+columnar copy is rebuilt only when the source workbook changes.
+
+Pre-build the cache for one or more exports with::
+
+    python -m bs4cl.ingest <export.xlsx> [<export.xlsx> ...]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPETITOR = "competitor"
+FOLLOWERS = "followers"
+VISITORS = "visitors"
+
+# Key under which our own metadata is stored in the Parquet schema.
+_METADATA_KEY = b"bs4cl"
+# Bump when normalize_sheet changes its output, so old columnar copies rebuild.
+COLUMNAR_FORMAT = 2
+
+# Content hashes keyed on (path, mtime, size), so unchanged files are hashed once.
+_content_hashes = {}
+
+
+def page_slug(name):
+    """Slug of a page title or file-name prefix, e.g. "business-schools-4-climate-leadership-africa"."""
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+
+
+def _load_page_aliases(config):
+    """{slug: page} from a JSON object mapping page titles (or slugs) to the page's URL slug."""
+    return {page_slug(title): page_slug(page) for title, page in json.loads(config or "{}").items()}
+
+
+# LinkedIn names competitor exports after the page title and the others after
+# its URL slug. When the two differ, map the title to the URL slug, e.g.
+#   BS4CL_PAGE_ALIASES='{"Lagos Sustainability Centre": "lagos-sustainability"}'
+PAGE_ALIASES = _load_page_aliases(os.environ.get("BS4CL_PAGE_ALIASES"))
+
+
+def page_id(name):
+    """The page a title or file-name prefix refers to, after ``PAGE_ALIASES``."""
+    slug = page_slug(name)
+    return PAGE_ALIASES.get(slug, slug)
+
+
+def file_signature(file_path):
+    """Return (mtime_ns, sha256 hex digest) identifying this version of the file."""
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    if key not in _content_hashes:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+        _content_hashes[key] = digest.hexdigest()
+    return stat.st_mtime_ns, _content_hashes[key]
+
+
+def export_kind(file_path):
+    """Guess which LinkedIn export a file is from its name."""
+    name = os.path.basename(file_path).lower()
+    if "_competitor_analytics_" in name:
+        return COMPETITOR
+    if "_followers_" in name:
+        return FOLLOWERS
+    if "_visitors_" in name:
+        return VISITORS
+    raise ValueError(f"Unrecognised LinkedIn export: {file_path}")
+
+
+def export_page(file_path):
+    """Slug of the LinkedIn page an export belongs to, taken from its file name.
+
+    LinkedIn names competitor exports after the page title and the others after
+    the page's URL slug; both map to e.g. "business-schools-4-climate-leadership-africa".
+    Titles whose slug differs from the URL slug are mapped through ``PAGE_ALIASES``.
+    """
+    name = os.path.basename(file_path).lower()
+    marker = {COMPETITOR: "_competitor_analytics_", FOLLOWERS: "_followers_", VISITORS: "_visitors_"}
+    return page_id(name.split(marker[export_kind(file_path)])[0])
+
+
+def find_exports(directory, recursive=False):
+    """Paths of all LinkedIn XLSX exports in a directory, sorted by path.
+
+    With ``recursive``, sub-directories are searched too (e.g. one folder per
+    organisation); hidden directories such as the columnar caches are skipped.
+    """
+    exports = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".")) if recursive else []
+        for name in sorted(files):
+            if not name.lower().endswith(".xlsx") or name.startswith((".", "~$")):
+                continue
+            try:
+                export_kind(name)
+            except ValueError:
+                continue
+            exports.append(os.path.join(root, name))
+    return exports
+
+
+def read_sheet_names(file_path):
+    """List sheet names from the workbook index without loading any cells."""
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def downcast(series):
+    """Store whole-number metrics in the smallest integer dtype that fits.
+
+    Columns with gaps or fractions stay float64 so aggregations keep their precision.
+    """
+    if pd.api.types.is_float_dtype(series) and series.notna().all() and (series % 1 == 0).all():
+        series = series.astype("int64")
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    return series
+
+
+def widen(df):
+    """Upcast downcast integer metrics to int64 before summing them.
+
+    pandas keeps e.g. int8 through a groupby sum, which would silently overflow.
+    """
+    int_cols = df.select_dtypes(include="integer").columns
+    return df.astype(dict.fromkeys(int_cols, "int64")) if len(int_cols) else df
+
+
+def normalize_sheet(raw, kind):
+    """Turn a header-less sheet into a typed frame.
+
+    Competitor exports start with a (start date, end date) row followed by the
+    header row; the period is kept in ``df.attrs["period"]``. Other sheets use
+    their first row as header when it is all strings.
+
+    Sheets with a ``Date`` column become time series: a sorted ``DatetimeIndex``
+    named "Date" and numeric metric columns. Other sheets get numeric "total"
+    columns (every metric column, for competitors) and category label columns.
+    Integer metrics are downcast to the smallest dtype that holds them.
+    """
+    df = raw
+    period = None
+    if df.empty:
+        return df.copy()
+    if kind == COMPETITOR:
+        period = (str(df.iloc[0, 0]), str(df.iloc[0, 1]))
+        df = df.iloc[1:]
+    if kind == COMPETITOR or all(isinstance(x, str) for x in df.iloc[0]):
+        header = [str(col) for col in df.iloc[0]]
+        df = df.iloc[1:].set_axis(header, axis=1).reset_index(drop=True)
+    else:
+        df = df.set_axis([str(col) for col in df.columns], axis=1)
+
+    if "Date" in df.columns:
+        dates = pd.to_datetime(df["Date"], errors="coerce")
+        df = df.drop(columns="Date").set_index(pd.DatetimeIndex(dates, name="Date"))
+        df = df[df.index.notna()].sort_index()
+        for col in df.columns:
+            df[col] = downcast(pd.to_numeric(df[col], errors="coerce"))
+    else:
+        for i, col in enumerate(df.columns):
+            if (kind == COMPETITOR and i > 0) or "total" in col.lower():
+                df[col] = downcast(pd.to_numeric(df[col], errors="coerce"))
+            else:
+                # Labels such as company sizes mix ints and strings in XLSX.
+                df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x)).astype("category")
+
+    if period is not None:
+        df.attrs["period"] = period
+    return df
+
+
+def columnar_path(file_path, sheet_name):
+    """Location of the columnar copy of one sheet of an export."""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    safe_sheet = re.sub(r"[^\w.-]+", "_", sheet_name)
+    return os.path.join(directory, f".{name}.columnar", f"{safe_sheet}.parquet")
+
+
+def _read_columnar(path, content_hash, sheet_name):
+    """Return the cached frame if it was built from this workbook version, else None."""
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path, memory_map=True).metadata or {}
+    info = json.loads(metadata.get(_METADATA_KEY, b"{}"))
+    if (
+        info.get("format") != COLUMNAR_FORMAT
+        or info.get("source_sha256") != content_hash
+        or info.get("sheet") != sheet_name
+    ):
+        return None
+    df = pq.read_table(path, memory_map=True).to_pandas()
+    if info.get("period"):
+        df.attrs["period"] = tuple(info["period"])
+    return df
+
+
+def _write_columnar(df, path, content_hash, sheet_name):
+    # Only time series carry a meaningful (Date) index.
+    table = pa.Table.from_pandas(df, preserve_index=isinstance(df.index, pd.DatetimeIndex))
+    info = {"format": COLUMNAR_FORMAT, "source_sha256": content_hash, "sheet": sheet_name, "period": df.attrs.get("period")}
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _METADATA_KEY: json.dumps(info).encode()}
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_sheet(file_path, sheet_name, signature=None):
+    """Load one normalized sheet, from its columnar copy when it is up to date.
+
+    ``signature`` is the (mtime_ns, content_hash) pair from ``file_signature``;
+    pass it when the caller already has it to avoid re-stat'ing the file.
+    """
+    _, content_hash = signature or file_signature(file_path)
+    path = columnar_path(file_path, sheet_name)
+    df = _read_columnar(path, content_hash, sheet_name)
+    if df is not None:
+        return df
+
+    raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+    df = normalize_sheet(raw, export_kind(file_path))
+    try:
+        _write_columnar(df, path, content_hash, sheet_name)
+    except OSError:
+        # A read-only export folder just means we parse the XLSX every time.
+        pass
+    return df
+
+
+def ingest(file_path):
+    """Build (or refresh) the columnar copies of every sheet in an export."""
+    signature = file_signature(file_path)
+    sheet_names = read_sheet_names(file_path)
+    for sheet_name in sheet_names:
+        load_sheet(file_path, sheet_name, signature)
+    return sheet_names
+
+
+if __name__ == "__main__":
+    for export in sys.argv[1:]:
+        sheets = ingest(export)
+        print(f"{export}: {len(sheets)} sheet(s) -> {os.path.dirname(columnar_path(export, ''))}")
@@ -0,0 +1,244 @@
+"""Automated insights shown by the dashboard and the batch reports.
+
+The engine works on whole metric blocks at once: extremes, period-over-period
+and year-over-year changes, rolling averages and growth rankings are each one
+NumPy pass over a (rows x metrics) array, so sheets with hundreds of metric or
+category columns cost no per-column pandas lookups.
+
+The ``*_insights`` functions turn those results into the markdown sentences
+shown for each view. An empty list means no insight applies; callers decide
+how to say so.
+"""
+
+import numpy as np
+import pandas as pd
+
+from bs4cl import ingest, rollups
+
+# Which metric columns get a period-over-period summary, per export kind.
+TOTAL_MARKERS = {
+    ingest.FOLLOWERS: "total",
+    ingest.VISITORS: "(total)",
+}
+
+# Number of periods averaged for the "Rolling avg" trend column.
+ROLLING_WINDOW = 3
+# How far the period matched for "YoY %" may start from exactly one year earlier.
+YOY_TOLERANCE = pd.Timedelta(days=3)
+
+# Derived competitor metric: New Followers relative to the period's starting followers.
+FOLLOWER_GROWTH = "Follower growth %"
+
+
+def _metric_block(df, metrics):
+    """(rows x metrics) float array of the given columns, NaN for missing values."""
+    return df[metrics].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def extremes(df, label_col, metrics):
+    """Highest and lowest row of every metric, in one pass.
+
+    Returns a frame indexed by metric with max_label, max_value, min_label and
+    min_value columns. Ties resolve to the first row, NaNs are skipped and
+    all-NaN metrics are left out. Values keep each column's own dtype.
+    """
+    values = _metric_block(df, metrics)
+    has_data = ~np.isnan(values).all(axis=0)
+    filled = np.where(np.isnan(values), -np.inf, values)
+    max_pos = filled.argmax(axis=0)
+    min_pos = np.where(np.isnan(values), np.inf, values).argmin(axis=0)
+
+    labels = df[label_col].to_numpy()
+    rows = []
+    for j in np.flatnonzero(has_data):
+        column = df[metrics[j]].to_numpy()
+        rows.append((metrics[j], labels[max_pos[j]], column[max_pos[j]], labels[min_pos[j]], column[min_pos[j]]))
+    return pd.DataFrame(rows, columns=["metric", "max_label", "max_value", "min_label", "min_value"]).set_index("metric")
+
+
+def rolling_mean(values, window):
+    """Trailing mean over ``window`` rows of every column, via one cumulative sum.
+
+    Rows before a full window average what is available.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype="float64"))
+    cumsum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumsum[ends] - cumsum[starts]) / (ends - starts)[:, None]
+
+
+def _pct_change(current, previous):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous != 0, (current - previous) / previous * 100, np.nan)
+
+
+def metric_trends(period_agg, metrics, window=ROLLING_WINDOW):
+    """Latest-period trends of every metric of a rollup query.
+
+    Columns: Current, Previous, Change % (vs the previous period), YoY % (vs
+    the period one year before the latest, when the range covers it), Rolling
+    avg (last ``window`` periods) and Growth rank (1 = largest Change %).
+    """
+    values = _metric_block(period_agg, metrics)
+    n = len(values)
+    current = values[-1] if n else np.full(len(metrics), np.nan)
+    previous = values[-2] if n >= 2 else np.full(len(metrics), np.nan)
+    change = _pct_change(current, previous)
+
+    year_ago = np.full(len(metrics), np.nan)
+    if n:
+        # The period starting nearest to one year before the latest: weekly
+        # periods start on Mondays, so the exact date rarely is a period start.
+        dates = pd.DatetimeIndex(period_agg["Date"])
+        target = dates[-1] - pd.DateOffset(years=1)
+        pos = dates.searchsorted(target)
+        nearest = min((p for p in (pos - 1, pos) if 0 <= p < n - 1), key=lambda p: abs(dates[p] - target), default=None)
+        if nearest is not None and abs(dates[nearest] - target) <= YOY_TOLERANCE:
+            year_ago = values[nearest]
+    yoy = _pct_change(current, year_ago)
+
+    rolling = rolling_mean(values, window)[-1] if n else np.full(len(metrics), np.nan)
+
+    # Rank by change, largest first; metrics without a change rank last.
+    order = np.argsort(-np.where(np.isnan(change), -np.inf, change), kind="stable")
+    rank = np.empty(len(metrics), dtype="int64")
+    rank[order] = np.arange(1, len(metrics) + 1)
+
+    return pd.DataFrame(
+        {
+            "Current": current,
+            "Previous": previous,
+            "Change %": change,
+            "YoY %": yoy,
+            "Rolling avg": rolling,
+            "Growth rank": rank,
+        },
+        index=pd.Index(metrics, name="Metric"),
+    ).sort_values("Growth rank")
+
+
+def _follower_growth(df):
+    total = _metric_block(df, ["Total Followers"])[:, 0]
+    new = _metric_block(df, ["New Followers"])[:, 0]
+    start = total - new
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(start > 0, new / start * 100, np.nan)
+
+
+def competitor_growth(df):
+    """Follower growth over the export period per competitor, ranked.
+
+    Growth is New Followers relative to the follower count at the start of the
+    period (Total Followers - New Followers). Returns None when the export lacks
+    either column.
+    """
+    if "Total Followers" not in df.columns or "New Followers" not in df.columns:
+        return None
+    competitor_col = df.columns[0]
+    growth = _follower_growth(df)
+    ranking = pd.DataFrame({
+        competitor_col: df[competitor_col].to_numpy(),
+        "New Followers": df["New Followers"].to_numpy(),
+        FOLLOWER_GROWTH: growth,
+    })
+    order = np.argsort(-np.where(np.isnan(growth), -np.inf, growth), kind="stable")
+    ranking = ranking.iloc[order].reset_index(drop=True)
+    ranking.index = pd.RangeIndex(1, len(ranking) + 1, name="Rank")
+    return ranking
+
+
+def history_metrics(history):
+    """Metrics of a competitor history, plus FOLLOWER_GROWTH when it can be derived."""
+    metrics = history.columns[3:].tolist()
+    if "Total Followers" in metrics and "New Followers" in metrics:
+        metrics.append(FOLLOWER_GROWTH)
+    return metrics
+
+
+def competitor_trajectories(history, metric):
+    """Long (competitor, Period end, Value) frame of one metric across export periods."""
+    competitor_col = history.columns[0]
+    values = _follower_growth(history) if metric == FOLLOWER_GROWTH else _metric_block(history, [metric])[:, 0]
+    # Two exports ending on the same day: the one covering the shorter window wins.
+    cells = pd.DataFrame({
+        competitor_col: history[competitor_col].to_numpy(),
+        "Period end": history["Period end"].to_numpy(),
+        "Value": values,
+    }).drop_duplicates([competitor_col, "Period end"], keep="last")
+    return cells.dropna(subset=["Value"]).reset_index(drop=True)
+
+
+def competitor_rank_changes(history, metric):
+    """Rank of every competitor by ``metric`` in each export period, latest first.
+
+    One "Rank <period end>" column per period (1 = highest value; competitors
+    missing from a period are unranked) and "Rank change" between the last two
+    periods, positive when a competitor moved up. Sorted by the latest rank.
+    """
+    competitor_col = history.columns[0]
+    matrix = competitor_trajectories(history, metric).pivot(index=competitor_col, columns="Period end", values="Value")
+    ranks = matrix.rank(axis=0, ascending=False, method="min")
+    latest = ranks.iloc[:, -1]
+    changes = ranks.iloc[:, -2] - latest if ranks.shape[1] >= 2 else pd.Series(np.nan, index=ranks.index)
+    ranks.columns = [f"Rank {end:%d %b %Y}" for end in ranks.columns]
+    ranks = ranks.iloc[:, ::-1].astype("Int64")
+    ranks["Rank change"] = changes.astype("Int64")
+    order = np.argsort(latest.fillna(np.inf).to_numpy(), kind="stable")
+    return ranks.iloc[order]
+
+
+def competitor_insights(df):
+    """Highest/lowest page by total followers and by total posts."""
+    wording = {"Total Followers": "followers", "Total posts": "posts"}
+    metrics = [col for col in wording if col in df.columns]
+    if not metrics:
+        return []
+    found = extremes(df, df.columns[0], metrics)
+    return [
+        f"The page with the highest {wording[col]} is **{row.max_label}** with **{row.max_value}** {wording[col]}, while **{row.min_label}** has the lowest with **{row.min_value}** {wording[col]}."
+        for col, row in found.iterrows()
+    ]
+
+
+def category_insights(df):
+    """Highest/lowest category for every numeric "total" column of a breakdown sheet."""
+    numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
+    total_metrics = [col for col in numeric_cols if "total" in col.lower()]
+    if not total_metrics:
+        return []
+    category_col = df.columns[0]  # Assume the first column holds the category.
+    insights = []
+    for col, row in extremes(df, category_col, total_metrics).iterrows():
+        if row.max_value == row.min_value:
+            insights.append(f"For **{col}**, all categories have the same value: **{row.max_value}**.")
+        else:
+            insights.append(f"For **{category_col}**, **{row.max_label}** has the highest value (**{row.max_value}**) while **{row.min_label}** has the lowest (**{row.min_value}**).")
+    return insights
+
+
+def period_change_insights(period_agg, granularity, marker="total"):
+    """Compare the last two periods of a rollup query for every metric containing ``marker``."""
+    total_metrics = [
+        col for col in period_agg.columns
+        if col != "Date" and marker in str(col).lower() and pd.api.types.is_numeric_dtype(period_agg[col])
+    ]
+    if not total_metrics or len(period_agg) < 2:
+        return []
+
+    label_format = rollups.LABEL_FORMATS[granularity]
+    current_period = period_agg.iloc[-1]["Date"].strftime(label_format)
+    previous_period = period_agg.iloc[-2]["Date"].strftime(label_format)
+    values = _metric_block(period_agg.iloc[-2:], total_metrics)
+    changes = _pct_change(values[1], values[0])
+    insights = []
+    for col, previous_val, pct_change in zip(total_metrics, values[0], changes):
+        if previous_val == 0:
+            insights.append(f"No previous data to compare for {col}.")
+        elif pct_change > 0:
+            insights.append(f"Great job! You gained {pct_change:.1f}% more {col} in {current_period} compared to {previous_period}.")
+        elif pct_change < 0:
+            insights.append(f"A {abs(pct_change):.1f}% loss in {col} in {current_period} compared to {previous_period}.")
+        else:
+            insights.append(f"There was no change in {col} from {previous_period} to {current_period}.")
+    return insights
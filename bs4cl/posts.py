@@ -0,0 +1,219 @@
+"""Post-level engagement ranking over LinkedIn content exports.
+
+Content exports (``<page>_content_<id>.xlsx``) list every post of the page with
+its impressions, clicks, likes, comments and reposts, and run to tens of
+thousands of rows. They are streamed with openpyxl's read-only reader in
+chunks of ``CHUNK_ROWS`` rows; each chunk is scored with NumPy and only its
+best candidates are offered to one bounded min-heap per ranking metric, so
+memory stays proportional to ``max_k`` rather than to the number of posts
+(apart from the set of post links used to skip posts listed twice)::
+
+    ranking = rank_posts(paths, follower_counts(new_followers, current_total=153))
+    ranking.top("Total engagement", 10)
+
+"Follower engagement %" is a post's likes + comments + reposts relative to the
+page's follower count on the day it was posted.
+"""
+
+import heapq
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from bs4cl import ingest
+
+POST_MARKER = "_content_"
+
+CHUNK_ROWS = 5000
+# Largest ranking length kept per metric.
+MAX_K = 100
+
+# Columns kept for every ranked post, when the export has them.
+POST_FIELDS = ["Post title", "Post link", "Post type", "Created date"]
+ENGAGEMENT_COLUMNS = ["Likes", "Comments", "Reposts"]
+TOTAL_ENGAGEMENT = "Total engagement"
+FOLLOWER_ENGAGEMENT = "Follower engagement %"
+# Rankable metrics in the order the dashboard lists them.
+RANK_METRICS = [TOTAL_ENGAGEMENT, FOLLOWER_ENGAGEMENT, *ENGAGEMENT_COLUMNS, "Clicks", "Impressions"]
+# The header row is the first row naming this column (a description row may precede it).
+_HEADER_MARKER = "Created date"
+
+
+def post_export_page(file_path):
+    """Page slug of a content export, as ``ingest.export_page`` does for the others."""
+    return ingest.page_id(os.path.basename(file_path).lower().split(POST_MARKER)[0])
+
+
+def find_post_exports(directory, page=None):
+    """Content exports under ``directory`` (recursively), newest file first, optionally for one page."""
+    exports = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if (name.lower().endswith(".xlsx") and POST_MARKER in name.lower()
+                    and not name.startswith((".", "~$"))
+                    and (page is None or post_export_page(name) == page)):
+                exports.append(os.path.join(root, name))
+    return sorted(exports, key=os.path.getmtime, reverse=True)
+
+
+def follower_counts(new_followers, current_total=None):
+    """Follower count per day from a daily new-followers series.
+
+    The running sum of new followers is shifted so that it ends at
+    ``current_total`` (e.g. the page's "Total Followers" in its competitor
+    export); without it, counts start from the first day of the series.
+    """
+    counts = ingest.widen(new_followers.fillna(0).to_frame()).iloc[:, 0].cumsum()
+    if current_total is not None and len(counts):
+        counts += current_total - counts.iloc[-1]
+    return counts.clip(lower=1)
+
+
+def page_total_followers(competitor_df, page):
+    """The page's own "Total Followers" from a competitor export, or None."""
+    if competitor_df is None or "Total Followers" not in competitor_df.columns:
+        return None
+    names = competitor_df.iloc[:, 0].astype(str).map(ingest.page_id)
+    matches = competitor_df.loc[(names == page).to_numpy(), "Total Followers"]
+    return None if matches.empty else int(matches.iloc[0])
+
+
+def page_follower_counts(followers_sheets, competitor_sheets, page):
+    """Daily follower counts of a page from its followers and competitor sheets, or None.
+
+    Both arguments map sheet name -> normalized frame (e.g. the dashboard's
+    stored sheets); the first time-series followers sheet with a "total"
+    column supplies the daily new followers.
+    """
+    competitor_df = next(iter(competitor_sheets.values()), None) if competitor_sheets else None
+    for df in followers_sheets.values():
+        totals = [col for col in df.columns if "total" in col.lower()]
+        if isinstance(df.index, pd.DatetimeIndex) and totals:
+            return follower_counts(df[totals[0]], page_total_followers(competitor_df, page))
+    return None
+
+
+def iter_post_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Yield the posts of a content export as DataFrames of up to ``chunk_rows`` rows."""
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            # Without this, a missing <dimension> tag costs an extra pass over the sheet.
+            ws.reset_dimensions()
+            rows = ws.iter_rows(values_only=True)
+            header = None
+            for row in rows:
+                if row and _HEADER_MARKER in row:
+                    header = [str(col).strip() if col is not None else "" for col in row]
+                    break
+            if header is None:
+                continue
+            chunk = []
+            for row in rows:
+                if any(value is not None for value in row):
+                    chunk.append(row[:len(header)])
+                if len(chunk) == chunk_rows:
+                    yield pd.DataFrame(chunk, columns=header)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=header)
+    finally:
+        wb.close()
+
+
+def _score(chunk, followers):
+    """Numeric metric block and total engagement / follower engagement % of a chunk."""
+    scored = pd.DataFrame(index=chunk.index)
+    for col in RANK_METRICS[2:]:
+        if col in chunk.columns:
+            scored[col] = pd.to_numeric(chunk[col], errors="coerce")
+    present = [col for col in ENGAGEMENT_COLUMNS if col in scored.columns]
+    if present:
+        scored[TOTAL_ENGAGEMENT] = scored[present].sum(axis=1, min_count=1)
+        if followers is not None and len(followers) and "Created date" in chunk.columns:
+            created = pd.to_datetime(chunk["Created date"], errors="coerce", format="mixed")
+            # Posts before the follower history starts use its first day.
+            pos = np.clip(followers.index.searchsorted(created, side="right") - 1, 0, len(followers) - 1)
+            base = followers.to_numpy(dtype="float64")[pos]
+            scored[FOLLOWER_ENGAGEMENT] = np.where(created.notna(), scored[TOTAL_ENGAGEMENT] / base * 100, np.nan)
+    return scored
+
+
+class PostRanking:
+    """Top ``max_k`` posts per metric plus running totals, fed chunk by chunk."""
+
+    def __init__(self, max_k=MAX_K):
+        self.max_k = max_k
+        self.posts = 0
+        self.totals = {}
+        self._heaps = {}
+        self._seen = set()
+        self._order = 0
+
+    def add(self, chunk, followers=None):
+        if "Post link" in chunk.columns:
+            # Several exports may list the same post; the newest export (read first) wins.
+            # Posts without a link cannot be matched and are always kept.
+            links = chunk["Post link"].map(lambda x: None if pd.isna(x) else str(x).strip() or None)
+            linked = links.notna()
+            fresh = (~linked | ~(links.isin(self._seen) | links.duplicated())).to_numpy()
+            chunk = chunk[fresh]
+            self._seen.update(links[fresh].dropna())
+        if chunk.empty:
+            return
+        scored = _score(chunk, followers)
+        self.posts += len(chunk)
+
+        # Each metric's best rows of this chunk, then one record per candidate row.
+        candidates = {}
+        for metric in scored.columns:
+            values = scored[metric].to_numpy(dtype="float64", na_value=np.nan)
+            self.totals[metric] = self.totals.get(metric, 0.0) + np.nansum(values)
+            valid = np.flatnonzero(~np.isnan(values))
+            if len(valid) > self.max_k:
+                valid = np.sort(valid[np.argpartition(-values[valid], self.max_k - 1)[:self.max_k]])
+            candidates[metric] = (values, valid)
+        rows = np.unique(np.concatenate([valid for _, valid in candidates.values()]))
+        fields = chunk[[col for col in POST_FIELDS if col in chunk.columns]]
+        records = dict(zip(rows, pd.concat([fields, scored], axis=1).iloc[rows].to_dict("records")))
+
+        for metric, (values, valid) in candidates.items():
+            heap = self._heaps.setdefault(metric, [])
+            for i in valid:
+                # The counter breaks ties in favour of earlier posts, so records are never compared.
+                self._order += 1
+                entry = (values[i], -self._order, records[i])
+                if len(heap) < self.max_k:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+
+    @property
+    def metrics(self):
+        return [metric for metric in RANK_METRICS if metric in self._heaps]
+
+    def top(self, metric, k=10):
+        """The ``k`` best posts by ``metric``, best first, with every scored metric."""
+        best = heapq.nlargest(k, self._heaps.get(metric, []), key=lambda entry: entry[:2])
+        if not best:
+            return pd.DataFrame(columns=[*POST_FIELDS, metric])
+        rows = pd.DataFrame([record for _, _, record in best])
+        rows.index = pd.RangeIndex(1, len(rows) + 1, name="Rank")
+        return rows
+
+    def summary(self):
+        """Posts read and the average of every metric per post."""
+        return {"Posts": self.posts, **{f"Average {metric}": float(total) / self.posts
+                                         for metric, total in self.totals.items() if self.posts}}
+
+
+def rank_posts(file_paths, followers=None, max_k=MAX_K, chunk_rows=CHUNK_ROWS):
+    """Stream every content export (newest first) into one ``PostRanking``."""
+    ranking = PostRanking(max_k)
+    for path in file_paths:
+        for chunk in iter_post_chunks(path, chunk_rows):
+            ranking.add(chunk, followers)
+    return ranking
@@ -0,0 +1,125 @@
+"""Opt-in timing of the stages of one dashboard rerun.
+
+A ``RerunProfile`` records, for each named stage, the wall time and the change
+in resident memory, plus hit/miss counts of the caches the stage went through.
+Every finished stage can be appended to a JSON-lines log and is passed to an
+``on_update`` callback (the dashboard redraws its diagnostics panel there)::
+
+    profile = RerunProfile("Followers", log_path="profile.jsonl")
+    set_current(profile)
+    with profile.stage("load sheet"):
+        ...
+
+Caches report to the profile set for the current thread through
+``track_cache``; with no profile set the counting is a no-op.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_local = threading.local()
+
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def current():
+    """The profile set for this thread, if any."""
+    return getattr(_local, "profile", None)
+
+
+def set_current(profile):
+    """Make ``profile`` (or None) receive this thread's cache counts."""
+    _local.profile = profile
+
+
+def track_cache(name, cache_decorator):
+    """Wrap ``cache_decorator`` so calls and misses are counted on the active profile.
+
+    The miss counter sits inside the cached function, so it only runs when the
+    cache has to compute the value.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _note(name, "misses")
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            _note(name, "calls")
+            return cached(*args, **kwargs)
+
+        return call
+    return decorate
+
+
+def _note(cache_name, event):
+    profile = current()
+    if profile is not None:
+        profile.cache.setdefault(cache_name, {"calls": 0, "misses": 0})[event] += 1
+
+
+class RerunProfile:
+    """Stage timings, memory deltas and cache counts for one rerun."""
+
+    def __init__(self, label, log_path=None, on_update=None):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.log_path = log_path
+        self.on_update = on_update
+        self.stages = []
+        self.cache = {}
+
+    @contextmanager
+    def stage(self, name):
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            rss_after = _rss_bytes()
+            record = {
+                "stage": name,
+                "ms": round(elapsed * 1000, 2),
+                "rss_delta_mb": None if rss_before is None else round((rss_after - rss_before) / 2**20, 2),
+            }
+            self.stages.append(record)
+            self._log(record)
+            if self.on_update is not None:
+                self.on_update(self)
+
+    def cache_summary(self):
+        """{cache: {"calls", "misses", "hits"}} so far in this rerun."""
+        return {
+            name: {**counts, "hits": counts["calls"] - counts["misses"]}
+            for name, counts in self.cache.items()
+        }
+
+    def _log(self, record):
+        if not self.log_path:
+            return
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "rerun": self.rerun_id,
+            "view": self.label,
+            **record,
+            "cache": self.cache_summary(),
+        }
+        with open(self.log_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
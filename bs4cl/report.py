@@ -0,0 +1,184 @@
+"""Headless batch reports: the dashboard's insights and charts without Streamlit.
+
+For every page in the metrics store, every data source and every sheet, the
+report holds the automated insights and the Vega-Lite specs of the charts the
+dashboard would show by default, over the full stored history. Pages are
+processed in parallel, one per worker process.
+
+    python -m bs4cl.report [--db bs4cl_metrics.sqlite] [--page SLUG ...]
+                           [--granularity Monthly] [--format json html]
+                           [--out reports] [--workers N]
+
+writes ``<out>/<page>.json`` and/or ``<out>/<page>.html`` for each page.
+"""
+
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from bs4cl import charts, ingest, insights, rollups, store
+
+# Data sources as labelled in the dashboard.
+SOURCES = {
+    "Competitor Analytics": ingest.COMPETITOR,
+    "Followers": ingest.FOLLOWERS,
+    "Visitors": ingest.VISITORS,
+}
+
+
+def _records(frame):
+    """JSON-friendly rows of a table, with NaN as null."""
+    frame = frame.reset_index()
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def sheet_report(df, kind, granularity="Monthly"):
+    """Insights and chart specs for one normalized sheet."""
+    if kind == ingest.COMPETITOR:
+        competitor_col = df.columns[0]
+        metric_options = df.columns[1:].tolist()
+        report = {
+            "period": list(df.attrs.get("period", ())),
+            "insights": insights.competitor_insights(df),
+            "charts": [],
+        }
+        growth_ranking = insights.competitor_growth(df)
+        if growth_ranking is not None:
+            report["growth_ranking"] = _records(growth_ranking)
+        if metric_options:
+            chart = charts.competitor_bar_chart(df, metric_options[:2], df[competitor_col].unique().tolist())
+            report["charts"].append(chart.to_dict())
+        return report
+
+    if not isinstance(df.index, pd.DatetimeIndex):
+        numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
+        return {
+            "insights": insights.category_insights(df),
+            "charts": [charts.category_bar_chart(df, col).to_dict() for col in numeric_cols],
+        }
+
+    rollup = rollups.Rollup(df)
+    period_agg = rollup.query(rollup.min_date, rollup.max_date, granularity)
+    metric_options = [col for col in period_agg.columns if col != "Date"]
+    selected_metrics = charts.default_metrics(kind, metric_options)
+    report = {
+        "start": rollup.min_date.date().isoformat(),
+        "end": rollup.max_date.date().isoformat(),
+        "granularity": granularity,
+        "insights": insights.period_change_insights(period_agg, granularity, insights.TOTAL_MARKERS[kind]),
+        "trends": _records(insights.metric_trends(period_agg, metric_options)) if len(period_agg) else [],
+        "charts": [],
+    }
+    if selected_metrics:
+        report["charts"].append(charts.metrics_line_chart(period_agg, selected_metrics).to_dict())
+    return report
+
+
+def page_report(db_path, page, granularity="Monthly"):
+    """Report for every source and sheet of one page in the store."""
+    metrics_store = store.MetricsStore(db_path)
+    # Read every sheet as of one revision, even if exports are appended meanwhile.
+    revision = metrics_store.revision()
+    sources = {}
+    for label, kind in SOURCES.items():
+        sheets = {}
+        for sheet in metrics_store.sheet_names(page, kind, revision):
+            sheets[sheet] = sheet_report(metrics_store.load_sheet(page, kind, sheet, revision), kind, granularity)
+        if sheets:
+            sources[label] = sheets
+    return {
+        "page": page,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sources": sources,
+    }
+
+
+def _markdown_to_html(text):
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(text))
+
+
+def _script_json(value):
+    """JSON safe to inline in a <script>: "</" (e.g. a page named "</script>") would end the block."""
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def render_html(report):
+    """A standalone HTML page rendering the report's insights and charts with vega-embed."""
+    parts = [f"<h1>{html.escape(report['page'])}</h1>",
+             f"<p>Generated {html.escape(report['generated_at'])}</p>"]
+    specs = []
+    for source, sheets in report["sources"].items():
+        parts.append(f"<h2>{html.escape(source)}</h2>")
+        for sheet, section in sheets.items():
+            parts.append(f"<h3>{html.escape(sheet)}</h3>")
+            parts.append("<ul>" + "".join(f"<li>{_markdown_to_html(i)}</li>" for i in section["insights"]) + "</ul>")
+            for spec in section["charts"]:
+                parts.append(f'<div id="chart{len(specs)}"></div>')
+                specs.append(spec)
+    embeds = "\n".join(f"vegaEmbed('#chart{i}', {_script_json(spec)});" for i, spec in enumerate(specs))
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(report['page'])} LinkedIn report</title>
+<script src="https://cdn.jsdelivr.net/npm/vega@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-lite@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-embed@6"></script>
+</head>
+<body>
+{chr(10).join(parts)}
+<script>
+{embeds}
+</script>
+</body>
+</html>
+"""
+
+
+def write_report(db_path, page, out_dir, formats, granularity="Monthly"):
+    """Build one page's report and write it in each format; returns the paths written."""
+    report = page_report(db_path, page, granularity)
+    written = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{page}.{fmt}")
+        with open(path, "w", encoding="utf-8") as fh:
+            if fmt == "json":
+                json.dump(report, fh, indent=2, default=str)
+            else:
+                fh.write(render_html(report))
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate LinkedIn analytics reports without the dashboard.")
+    parser.add_argument("--db", default=store.DEFAULT_DB, help=f"SQLite metrics store (default: {store.DEFAULT_DB})")
+    parser.add_argument("--page", action="append", help="page slug to report on (default: every page)")
+    parser.add_argument("--granularity", choices=list(rollups.GRANULARITIES), default="Monthly")
+    parser.add_argument("--format", nargs="+", choices=["json", "html"], default=["json", "html"])
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    pages = args.page or store.MetricsStore(args.db).pages()
+    os.makedirs(args.out, exist_ok=True)
+    jobs = [(args.db, page, args.out, args.format, args.granularity) for page in pages]
+    if len(jobs) > 1 and args.workers != 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+            results = list(pool.map(write_report, *zip(*jobs)))
+    else:
+        results = [write_report(*job) for job in jobs]
+    for page, written in zip(pages, results):
+        print(f"{page}: {', '.join(written)}")
+
+
+if __name__ == "__main__":
+    main()
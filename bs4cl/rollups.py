@@ -0,0 +1,172 @@
+"""Precomputed daily / ISO-week / monthly rollups for time-series sheets.
+
+A ``Rollup`` is built once per sheet version. It keeps one prefix-sum array
+over the sorted days of the sheet plus, per granularity, the positions where a
+new period starts. Any (start, end) date range is then answered with binary
+searches and prefix-sum differences -- nothing is re-grouped per query::
+
+    rollup = Rollup(df)                      # df indexed by Date
+    rollup.query("2024-03-01", "2024-06-30", "Weekly")
+
+A ``CalendarIndex`` does the same for activity patterns: every row's weekday,
+week, month and hour are coded once, and a heatmap or seasonality breakdown
+for any metric and range is a ``bincount`` over a slice of those codes.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Granularity name -> how a day maps to the first day of its period.
+GRANULARITIES = {
+    "Daily": lambda days: days,
+    # ISO weeks start on Monday; W-SUN periods run Monday..Sunday.
+    "Weekly": lambda days: days.to_period("W-SUN").start_time,
+    "Monthly": lambda days: days.to_period("M").start_time,
+}
+
+# strftime formats used when naming a period in summaries.
+LABEL_FORMATS = {
+    "Daily": "%d %b %Y",
+    "Weekly": "the week of %d %b",
+    "Monthly": "%b",
+}
+
+
+class Rollup:
+    """Prefix sums of a Date-indexed frame's numeric columns."""
+
+    def __init__(self, df):
+        numeric = df.select_dtypes(include="number")
+        self.columns = list(numeric.columns)
+        self._integer = [pd.api.types.is_integer_dtype(numeric[col]) for col in self.columns]
+
+        # Collapse duplicate dates so every position is one calendar day.
+        daily = numeric.groupby(numeric.index.normalize()).sum(min_count=1)
+        self.days = daily.index
+        values = np.nan_to_num(daily.to_numpy(dtype="float64"))
+        self._prefix = np.vstack([np.zeros((1, len(self.columns))), np.cumsum(values, axis=0)])
+
+        # Per granularity: the period each run of days belongs to, and where it starts.
+        self._periods = {}
+        for name, to_period_start in GRANULARITIES.items():
+            starts = pd.DatetimeIndex(to_period_start(self.days))
+            change = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]]) if len(starts) else np.array([], int)
+            bounds = np.append(change, len(starts))
+            self._periods[name] = (starts[change], bounds)
+
+    @property
+    def min_date(self):
+        return self.days.min()
+
+    @property
+    def max_date(self):
+        return self.days.max()
+
+    def query(self, start, end, granularity="Monthly"):
+        """Per-period sums of every metric for days in [start, end].
+
+        Returns a frame with a "Date" column (the start of each period) followed
+        by the metric columns. Periods cut by the range only count its days.
+        """
+        labels, bounds = self._periods[granularity]
+        i = self.days.searchsorted(pd.Timestamp(start), side="left")
+        j = self.days.searchsorted(pd.Timestamp(end), side="right")
+        if i >= j:
+            return pd.DataFrame(columns=["Date", *self.columns])
+
+        first = np.searchsorted(bounds, i, side="right") - 1
+        last = np.searchsorted(bounds, j, side="left")
+        edges = np.clip(bounds[first:last + 1], i, j)
+        sums = self._prefix[edges[1:]] - self._prefix[edges[:-1]]
+
+        # Build the frame in one go; per-column astype dominates small queries.
+        whole = np.rint(sums).astype("int64")
+        data = {"Date": labels[first:last]}
+        for k, (col, is_int) in enumerate(zip(self.columns, self._integer)):
+            data[col] = whole[:, k] if is_int else sums[:, k]
+        return pd.DataFrame(data)
+
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+class CalendarIndex:
+    """Weekday / week / month / hour codes of a Date-indexed frame's rows."""
+
+    def __init__(self, df):
+        numeric = df.select_dtypes(include="number")
+        self.columns = list(numeric.columns)
+        self.index = df.index
+        values = numeric.to_numpy(dtype="float64", na_value=np.nan)
+        self._present = ~np.isnan(values)
+        self._values = np.where(self._present, values, 0.0)
+
+        self._weekday = self.index.dayofweek.to_numpy()
+        self._month = self.index.month.to_numpy() - 1
+        self._hour = self.index.hour.to_numpy()
+        # Exports are daily unless some row carries a time of day.
+        self.has_hours = bool(self._hour.any() or self.index.minute.to_numpy().any())
+        self._week, self._weeks = pd.factorize(GRANULARITIES["Weekly"](self.index), sort=True)
+
+    def _rows(self, start, end):
+        """Row positions covering the whole days from start to end."""
+        i = self.index.searchsorted(pd.Timestamp(start), side="left")
+        j = self.index.searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side="left")
+        return slice(i, j)
+
+    def _cells(self, codes, metric, rows, size):
+        """Sum and number of present values of ``metric`` per code."""
+        col = self.columns.index(metric)
+        sums = np.bincount(codes, weights=self._values[rows, col], minlength=size)
+        counts = np.bincount(codes, weights=self._present[rows, col], minlength=size)
+        return sums, counts
+
+    def weekday_by_week(self, metric, start, end):
+        """Long (Week, Weekday, Value) frame of ``metric`` summed per day of each week."""
+        rows = self._rows(start, end)
+        week = self._week[rows]
+        if not len(week):
+            return pd.DataFrame(columns=["Week", "Weekday", "Value"])
+        first = week[0]
+        n_weeks = week[-1] - first + 1
+        sums, counts = self._cells((week - first) * 7 + self._weekday[rows], metric, rows, n_weeks * 7)
+        cells = np.flatnonzero(counts)
+        return pd.DataFrame({
+            "Week": self._weeks[first + cells // 7],
+            "Weekday": np.array(WEEKDAYS)[cells % 7],
+            "Value": sums[cells],
+        })
+
+    def weekday_by_hour(self, metric, start, end):
+        """Long (Weekday, Hour, Value) frame of ``metric``'s average per hour, or None for daily exports."""
+        if not self.has_hours:
+            return None
+        rows = self._rows(start, end)
+        sums, counts = self._cells(self._weekday[rows] * 24 + self._hour[rows], metric, rows, 7 * 24)
+        cells = np.flatnonzero(counts)
+        return pd.DataFrame({
+            "Weekday": np.array(WEEKDAYS)[cells // 24],
+            "Hour": cells % 24,
+            "Value": sums[cells] / counts[cells],
+        })
+
+    def seasonality(self, metric, start, end):
+        """Average and share of total of ``metric`` per weekday and per month of the year.
+
+        Returns {"Weekday": frame, "Month": frame}, each with the label column,
+        "Average" (per row of the sheet, i.e. per day for daily exports) and
+        "Share %".
+        """
+        rows = self._rows(start, end)
+        breakdowns = {}
+        for name, codes, labels in (("Weekday", self._weekday, WEEKDAYS), ("Month", self._month, MONTHS)):
+            sums, counts = self._cells(codes[rows], metric, rows, len(labels))
+            total = sums.sum()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                breakdowns[name] = pd.DataFrame({
+                    name: labels,
+                    "Average": np.where(counts > 0, sums / counts, np.nan),
+                    "Share %": sums / total * 100 if total else np.full(len(labels), np.nan),
+                })[counts > 0].reset_index(drop=True)
+        return breakdowns
@@ -0,0 +1,425 @@
+"""Persistent SQLite store of LinkedIn page metrics.
+
+New exports are appended incrementally: time-series sheets (those with a
+``Date`` column) only add the dates (or, for hourly exports, the date-times)
+the store does not have yet, so a daily
+refresh costs just the delta while the full history stays queryable. Sheets
+without dates (location, industry, competitor tables, ...) are kept as one
+snapshot per export, and the latest snapshot is what gets read back.
+Competitor tables are also indexed by (competitor, export period), so
+trajectories and rank changes across periods are answered from the index
+instead of the stored snapshots.
+
+Every stored row is tagged with the store revision that added it (the number
+of exports ingested once its export is in), and every read can be pinned to a
+revision. A reader that keeps using the revision it started with sees the same
+data while further exports are being appended.
+
+Exports for any number of pages (organisations) can share one store; the page
+is taken from each export's file name. When several new exports arrive at
+once, their sheets are parsed and normalized in parallel on a process pool and
+then written by the parent process (SQLite has a single writer). An export
+that cannot be parsed (corrupt, or still being synced) is reported and skipped;
+the others are stored.
+
+Append exports, or every export found under a directory, with::
+
+    python -m bs4cl.store [--db bs4cl_metrics.sqlite] [--workers N] <export.xlsx | directory> [...]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from bs4cl import ingest
+
+DEFAULT_DB = "bs4cl_metrics.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    page TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    page TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    is_time_series INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (page, kind, sheet)
+);
+CREATE TABLE IF NOT EXISTS daily_metrics (
+    page TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (page, kind, sheet, metric, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    page TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    source_sha256 TEXT NOT NULL,
+    attrs TEXT NOT NULL,
+    data BLOB NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS snapshots_sheet ON snapshots (page, kind, sheet);
+CREATE TABLE IF NOT EXISTS competitor_history (
+    page TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    competitor TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (page, sheet, competitor, period_end, period_start, metric)
+) WITHOUT ROWID;
+"""
+
+
+# Tables whose rows are tagged with the revision that added them. Stores
+# created before the tag existed get the column, with their rows at revision 0.
+_REVISIONED_TABLES = ("sheets", "daily_metrics", "snapshots", "competitor_history")
+# Reads without a revision see everything.
+_LATEST = 2**63 - 1
+
+
+def _date_keys(index):
+    """ISO keys of a DatetimeIndex: the day alone at midnight, with the time of day otherwise."""
+    days = index.strftime("%Y-%m-%d")
+    return pd.Index(np.where(index == index.normalize(), days, index.strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def _upto(revision):
+    return _LATEST if revision is None else revision
+
+
+def _period_dates(period):
+    """ISO (start, end) dates of a competitor export's period, or None if unreadable."""
+    try:
+        start, end = period
+        # Exports write "MM/DD/YYYY"; a date typed into the sheet reads back as "YYYY-MM-DD HH:MM:SS".
+        return tuple(pd.to_datetime(day).strftime("%Y-%m-%d") for day in (start, end))
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_export(file_path):
+    """Parse and normalize every sheet of an export (runs in pool workers)."""
+    signature = ingest.file_signature(file_path)
+    sheets = [(sheet, ingest.load_sheet(file_path, sheet, signature)) for sheet in ingest.read_sheet_names(file_path)]
+    return signature[1], sheets
+
+
+class MetricsStore:
+    """SQLite-backed history of every export ingested for every page."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        with self._connect() as conn, conn:
+            conn.executescript(_SCHEMA)
+            for table in _REVISIONED_TABLES:
+                if "revision" not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            self._backfill_competitor_history(conn)
+
+    def _connect(self):
+        # A connection per operation keeps the store safe to share across threads.
+        return closing(sqlite3.connect(self.db_path))
+
+    def revision(self):
+        """Changes whenever an export is ingested; use it as a cache key."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM ingested_files").fetchone()[0]
+
+    def is_ingested(self, file_path):
+        _, content_hash = ingest.file_signature(file_path)
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM ingested_files WHERE sha256 = ?", (content_hash,)).fetchone() is not None
+
+    def ingest(self, file_path):
+        """Append an export to the store.
+
+        Returns {sheet name: rows appended}, or None if this exact file was
+        ingested before. Raises the parse error if the export cannot be read.
+        """
+        results, failed = self.ingest_many([file_path])
+        if file_path in failed:
+            raise failed[file_path]
+        return results.get(file_path)
+
+    def ingest_many(self, file_paths, max_workers=None):
+        """Append several exports, parsing them in parallel.
+
+        Returns ({path: {sheet name: rows appended}}, {path: exception}): the
+        exports that were not ingested before, and those that could not be
+        parsed. A failed export does not keep the others out of the store.
+        Exports are written in path order, so for overlapping dates the first
+        export keeps its values.
+        """
+        pending = sorted(path for path in set(file_paths) if not self.is_ingested(path))
+        loaded, failed = {}, {}
+        if len(pending) > 1 and max_workers != 1:
+            # spawn rather than fork: the dashboard calls this from a threaded server.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers, mp_context=context) as pool:
+                futures = {path: pool.submit(_load_export, path) for path in pending}
+            for path, future in futures.items():
+                try:
+                    loaded[path] = future.result()
+                except Exception as e:
+                    failed[path] = e
+        else:
+            for path in pending:
+                try:
+                    loaded[path] = _load_export(path)
+                except Exception as e:
+                    failed[path] = e
+
+        results = {}
+        for path, (content_hash, sheets) in loaded.items():
+            appended = self._store_export(path, content_hash, sheets)
+            if appended is not None:
+                results[path] = appended
+        return results, failed
+
+    def _store_export(self, file_path, content_hash, sheets):
+        kind = ingest.export_kind(file_path)
+        page = ingest.export_page(file_path)
+        with self._connect() as conn, conn:
+            # Take the write lock up front so the revision number cannot be raced.
+            conn.execute("BEGIN IMMEDIATE")
+            seen = conn.execute("SELECT 1 FROM ingested_files WHERE sha256 = ?", (content_hash,)).fetchone()
+            if seen:
+                # The same file under two names, or another process got there first.
+                return None
+            revision = conn.execute("SELECT COUNT(*) FROM ingested_files").fetchone()[0] + 1
+            appended = {}
+            for position, (sheet, df) in enumerate(sheets):
+                if isinstance(df.index, pd.DatetimeIndex):
+                    appended[sheet] = self._append_time_series(conn, page, kind, sheet, position, df, revision)
+                else:
+                    appended[sheet] = self._add_snapshot(conn, page, kind, sheet, position, df, content_hash, revision)
+            conn.execute(
+                "INSERT INTO ingested_files VALUES (?, ?, ?, ?, ?)",
+                (content_hash, file_path, page, kind, datetime.now(timezone.utc).isoformat()),
+            )
+        return appended
+
+    def _register_sheet(self, conn, page, kind, sheet, position, columns, is_time_series, revision):
+        row = conn.execute(
+            "SELECT columns, revision FROM sheets WHERE page = ? AND kind = ? AND sheet = ?", (page, kind, sheet)
+        ).fetchone()
+        known = json.loads(row[0]) if row else []
+        # Keep the original column order; metrics new to this export go last.
+        merged = known + [col for col in columns if col not in known]
+        conn.execute(
+            "INSERT OR REPLACE INTO sheets VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (page, kind, sheet, position, int(is_time_series), json.dumps(merged), row[1] if row else revision),
+        )
+
+    def _append_time_series(self, conn, page, kind, sheet, position, df, revision):
+        self._register_sheet(conn, page, kind, sheet, position, list(df.columns), True, revision)
+        if df.empty:
+            return 0
+        dates = _date_keys(df.index)
+        existing = {
+            date for (date,) in conn.execute(
+                "SELECT DISTINCT date FROM daily_metrics"
+                " WHERE page = ? AND kind = ? AND sheet = ? AND date BETWEEN ? AND ?",
+                (page, kind, sheet, dates.min(), dates.max()),
+            )
+        }
+        # Rows repeating a date, within this export or against the store, are
+        # skipped: the first values seen for a date are kept.
+        new_rows = df[~dates.isin(existing) & ~dates.duplicated()]
+        if new_rows.empty:
+            return 0
+        new_dates = _date_keys(new_rows.index)
+        conn.executemany(
+            "INSERT INTO daily_metrics VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (page, kind, sheet, metric, date, None if pd.isna(value) else float(value), revision)
+                for metric in new_rows.columns
+                for date, value in zip(new_dates, new_rows[metric])
+            ),
+        )
+        return len(new_rows)
+
+    def _add_snapshot(self, conn, page, kind, sheet, position, df, content_hash, revision):
+        self._register_sheet(conn, page, kind, sheet, position, list(df.columns), False, revision)
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        conn.execute(
+            "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (page, kind, sheet, content_hash, json.dumps(df.attrs), buffer.getvalue(), revision),
+        )
+        if kind == ingest.COMPETITOR:
+            self._index_competitors(conn, page, sheet, df, revision)
+        return len(df)
+
+    def _index_competitors(self, conn, page, sheet, df, revision):
+        """Add a competitor snapshot's rows to the (competitor, period) index."""
+        period = _period_dates(df.attrs.get("period"))
+        if period is None or df.empty:
+            return
+        competitor_col, metrics = df.columns[0], df.columns[1:]
+        # The first export of a period keeps its values, as for time series.
+        conn.executemany(
+            "INSERT OR IGNORE INTO competitor_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (page, sheet, str(competitor), *period, metric, None if pd.isna(value) else float(value), revision)
+                for metric in metrics
+                for competitor, value in zip(df[competitor_col], df[metric])
+            ),
+        )
+
+    def _backfill_competitor_history(self, conn):
+        # Stores created before the index existed already hold the snapshots.
+        if conn.execute("SELECT 1 FROM competitor_history LIMIT 1").fetchone():
+            return
+        rows = conn.execute(
+            "SELECT page, sheet, attrs, data, revision FROM snapshots WHERE kind = ? ORDER BY rowid", (ingest.COMPETITOR,)
+        )
+        for page, sheet, attrs, data, revision in rows.fetchall():
+            df = pd.read_parquet(io.BytesIO(data))
+            df.attrs = json.loads(attrs)
+            self._index_competitors(conn, page, sheet, df, revision)
+
+    def pages(self, revision=None):
+        """Pages with data as of ``revision`` (default: the latest)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT page FROM sheets WHERE revision <= ? ORDER BY page", (_upto(revision),)
+            )
+            return [page for (page,) in rows]
+
+    def sheet_names(self, page, kind, revision=None):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT sheet FROM sheets WHERE page = ? AND kind = ? AND revision <= ? ORDER BY position",
+                (page, kind, _upto(revision)),
+            )
+            return [sheet for (sheet,) in rows]
+
+    def load_sheet(self, page, kind, sheet, revision=None):
+        """The sheet as ``ingest.normalize_sheet`` would return it, over the history ingested up to ``revision``."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT is_time_series, columns FROM sheets WHERE page = ? AND kind = ? AND sheet = ? AND revision <= ?",
+                (page, kind, sheet, _upto(revision)),
+            ).fetchone()
+            if row is None:
+                raise KeyError(sheet)
+            is_time_series, columns = row[0], json.loads(row[1])
+            if not is_time_series:
+                return self._latest_snapshot(conn, page, kind, sheet, revision)
+            long_df = pd.read_sql_query(
+                "SELECT date, metric, value FROM daily_metrics"
+                " WHERE page = ? AND kind = ? AND sheet = ? AND revision <= ?",
+                conn,
+                params=(page, kind, sheet, _upto(revision)),
+            )
+        df = long_df.pivot(index="date", columns="metric", values="value")
+        # Metrics first seen in a later export are not part of this revision.
+        df = df.reindex(columns=[col for col in columns if col in df.columns])
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.index, format="ISO8601"), name="Date")
+        df.columns.name = None
+        for col in df.columns:
+            df[col] = ingest.downcast(df[col])
+        return df.sort_index()
+
+    def competitor_history(self, page, sheet, competitors=None, revision=None):
+        """Every indexed period of a competitor sheet, one row per (competitor, period).
+
+        Columns are the sheet's competitor column, "Period start", "Period end"
+        and its metrics. ``competitors`` restricts the rows to those names.
+        """
+        query = (
+            "SELECT competitor, period_start, period_end, metric, value FROM competitor_history"
+            " WHERE page = ? AND sheet = ? AND revision <= ?"
+        )
+        params = [page, sheet, _upto(revision)]
+        if competitors is not None:
+            competitors = list(competitors)
+            query += f" AND competitor IN ({', '.join('?' * len(competitors))})"
+            params += competitors
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT columns FROM sheets WHERE page = ? AND kind = ? AND sheet = ?", (page, ingest.COMPETITOR, sheet)
+            ).fetchone()
+            if row is None:
+                raise KeyError(sheet)
+            competitor_col, *metrics = json.loads(row[0])
+            long_df = pd.read_sql_query(query, conn, params=params)
+        df = long_df.pivot(index=["competitor", "period_start", "period_end"], columns="metric", values="value")
+        # Every metric column is present even when no rows match, so callers can index by metric.
+        df = df.reindex(columns=metrics).reset_index()
+        df.columns.name = None
+        df = df.rename(columns={"competitor": competitor_col, "period_start": "Period start", "period_end": "Period end"})
+        for col in ("Period start", "Period end"):
+            df[col] = pd.to_datetime(df[col])
+        for col in df.columns[3:]:
+            df[col] = ingest.downcast(df[col])
+        return df.sort_values(["Period end", "Period start", competitor_col], ignore_index=True)
+
+    @staticmethod
+    def _latest_snapshot(conn, page, kind, sheet, revision=None):
+        attrs, data = conn.execute(
+            "SELECT attrs, data FROM snapshots WHERE page = ? AND kind = ? AND sheet = ? AND revision <= ?"
+            " ORDER BY rowid DESC LIMIT 1",
+            (page, kind, sheet, _upto(revision)),
+        ).fetchone()
+        df = pd.read_parquet(io.BytesIO(data))
+        df.attrs = {key: tuple(value) if isinstance(value, list) else value for key, value in json.loads(attrs).items()}
+        return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append LinkedIn exports to the local metrics store.")
+    parser.add_argument("exports", nargs="+", help="LinkedIn XLSX export files, or directories to search")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for export in args.exports:
+        paths.extend(ingest.find_exports(export, recursive=True) if os.path.isdir(export) else [export])
+
+    store = MetricsStore(args.db)
+    results, failed = store.ingest_many(paths, args.workers)
+    for path in sorted(set(paths)):
+        if path in failed:
+            # One "<path>: <error>" line per export on stderr, so callers can tell which failed.
+            error = " ".join(str(failed[path]).split()) or type(failed[path]).__name__
+            print(f"{path}: {error}", file=sys.stderr)
+        elif path not in results:
+            print(f"{path}: already ingested")
+        else:
+            print(f"{path}: " + ", ".join(f"{sheet} +{rows}" for sheet, rows in results[path].items()))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
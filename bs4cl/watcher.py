@@ -0,0 +1,105 @@
+"""Background watcher that loads new LinkedIn exports off the request path.
+
+An ``ExportWatcher`` thread polls the exports folder for new or changed
+``*_competitor_analytics_*``, ``*_followers_*`` and ``*_visitors_*`` files.
+When the set changes it calls ``refresh`` (append the exports to the store and
+return the new revision and {path: error} for exports that could not be
+loaded), then ``warm`` (load that revision's sheets into the
+caches), and only then publishes the revision. Readers pick up
+``watcher.revision`` once per rerun; publishing is a single attribute
+assignment, so a rerun sees either the old or the new revision, never a
+half-loaded one, and the first reader after a drop finds the caches warm.
+
+Files modified within the last ``SETTLE_SECONDS`` are left for the next poll,
+so an export that is still being copied in is not parsed half-written. The
+first poll waits for such files instead, so the first revision published is
+not missing exports copied in just before startup.
+
+An export that fails to load is reported in ``errors`` and left out of later
+polls until it changes (new mtime or content), so one bad file neither blocks
+the revision holding the other exports nor gets re-read every interval.
+
+The store tags rows with the revision that added them and readers pass the
+published revision to every read, so a rerun keeps seeing its revision's data
+while a later ingest is committing.
+"""
+
+import os
+import threading
+import time
+
+from bs4cl import ingest
+
+POLL_SECONDS = 30
+SETTLE_SECONDS = 2
+
+
+class ExportWatcher(threading.Thread):
+    """Polls ``directory`` and publishes a warmed store revision after each change."""
+
+    def __init__(self, directory, refresh, warm, interval=POLL_SECONDS):
+        super().__init__(name="bs4cl-export-watcher", daemon=True)
+        self.directory = directory
+        self.refresh = refresh
+        self.warm = warm
+        self.interval = interval
+        self.revision = None
+        self.error = None
+        self._signatures = None
+        # signature -> error of the exports that failed to load, until they change.
+        self._failed = {}
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+
+    def signatures(self, wait=False):
+        """(path, mtime_ns, sha256) of every settled export under the directory.
+
+        With ``wait``, block until exports still being written have settled
+        rather than leaving them out.
+        """
+        while True:
+            exports = ingest.find_exports(self.directory, recursive=True)
+            settled_before = time.time() - SETTLE_SECONDS
+            settled = [path for path in exports if os.path.getmtime(path) < settled_before]
+            if not wait or len(settled) == len(exports) or self._stopping.is_set():
+                return tuple((path, *ingest.file_signature(path)) for path in settled)
+            time.sleep(SETTLE_SECONDS)
+
+    @property
+    def errors(self):
+        """{path: error} of the exports that could not be loaded."""
+        return {signature[0]: error for signature, error in self._failed.items()}
+
+    def poll(self):
+        """Refresh and warm if the exports changed; return whether a new revision was published."""
+        signatures = self.signatures(wait=self.revision is None)
+        # Forget failures of exports that were changed or removed, so they are retried.
+        self._failed = {signature: error for signature, error in self._failed.items() if signature in signatures}
+        signatures = tuple(signature for signature in signatures if signature not in self._failed)
+        if signatures == self._signatures:
+            return False
+        revision, failed = self.refresh(signatures)
+        self.warm(revision)
+        self._failed.update((signature, failed[signature[0]]) for signature in signatures if signature[0] in failed)
+        self._signatures = tuple(signature for signature in signatures if signature[0] not in failed)
+        self.revision = revision
+        return True
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+                self.error = None
+            except Exception as e:
+                # Keep serving the last good revision; the next poll retries.
+                self.error = e
+            self._ready.set()
+            self._stopping.wait(self.interval)
+
+    def wait_ready(self, timeout=None):
+        """Block until the first poll has finished and return the published revision."""
+        self._ready.wait(timeout)
+        return self.revision
+
+    def stop(self):
+        self._stopping.set()
@@ -0,0 +1 @@
+"""Tests for the bs4cl package (run ``python -m pytest``)."""
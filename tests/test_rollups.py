@@ -0,0 +1,47 @@
+"""Tests for the prefix-sum rollups (bs4cl/rollups.py) against plain pandas resampling."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bs4cl import rollups
+
+# Period start of each granularity, as pandas resample rules.
+RESAMPLE_RULES = {
+    "Daily": {"rule": "D"},
+    "Weekly": {"rule": "W-MON", "label": "left", "closed": "left"},
+    "Monthly": {"rule": "MS"},
+}
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2024-01-01", "2024-12-31", freq="D", name="Date")
+    df = pd.DataFrame({
+        "Organic followers": rng.integers(0, 50, len(days)).astype("int8"),
+        "Engagement rate": rng.uniform(0, 1, len(days)),
+    }, index=days)
+    df.iloc[::7, 1] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("granularity", list(RESAMPLE_RULES))
+@pytest.mark.parametrize("start, end", [
+    # Both ends cut through a week and a month.
+    ("2024-02-14", "2024-05-22"),
+    ("2024-01-01", "2024-12-31"),
+    ("2024-03-06", "2024-03-08"),
+])
+def test_query_matches_resample(daily, granularity, start, end):
+    expected = daily.loc[start:end].astype({"Organic followers": "int64"}).resample(**RESAMPLE_RULES[granularity]).sum()
+    expected = expected.reset_index()
+
+    result = rollups.Rollup(daily).query(start, end, granularity)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_query_outside_the_data_is_empty(daily):
+    result = rollups.Rollup(daily).query("2025-01-01", "2025-02-01", "Weekly")
+    assert result.empty
+    assert result.columns.tolist() == ["Date", *daily.columns]
@@ -0,0 +1,121 @@
+"""Tests for the SQLite metrics store (bs4cl/store.py) on small hand-written exports."""
+
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from bs4cl import ingest, store
+
+PAGE = "test-org"
+SHEET = "New followers"
+
+
+def _write_followers(path, rows):
+    """A followers export whose "New followers" sheet has one (date, organic, total) row per entry."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET)
+    ws.append(["Date", "Organic followers", "Total followers"])
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+    return str(path)
+
+
+def _write_competitors(path, period, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("COMPETITORS")
+    ws.append(list(period))
+    ws.append(["Page", "Total Followers", "New Followers"])
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+    return str(path)
+
+
+def _days(start, periods, value):
+    return [(day.strftime("%m/%d/%Y"), value, value) for day in pd.date_range(start, periods=periods, freq="D")]
+
+
+@pytest.fixture
+def metrics_store(tmp_path):
+    return store.MetricsStore(str(tmp_path / "metrics.sqlite"))
+
+
+def test_overlapping_export_appends_only_new_dates(tmp_path, metrics_store):
+    first = _write_followers(tmp_path / f"{PAGE}_followers_1.xlsx", _days("2025-01-01", 5, 1))
+    second = _write_followers(tmp_path / f"{PAGE}_followers_2.xlsx", _days("2025-01-04", 5, 2))
+
+    assert metrics_store.ingest(first) == {SHEET: 5}
+    assert metrics_store.ingest(second) == {SHEET: 3}
+    assert metrics_store.ingest(second) is None
+
+    df = metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET)
+    assert df.index.equals(pd.date_range("2025-01-01", "2025-01-08", freq="D", name="Date"))
+    # Overlapping dates keep the values of the export ingested first.
+    assert df["Total followers"].tolist() == [1] * 5 + [2] * 3
+
+
+def test_repeated_dates_within_an_export_are_stored_once(tmp_path, metrics_store):
+    rows = _days("2025-01-01", 3, 1) + [("01/02/2025", 5, 5)]
+    path = _write_followers(tmp_path / f"{PAGE}_followers_1.xlsx", rows)
+
+    assert metrics_store.ingest(path) == {SHEET: 3}
+    df = metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET)
+    assert df["Total followers"].tolist() == [1, 1, 1]
+
+
+def test_read_pinned_to_a_revision_ignores_later_exports(tmp_path, metrics_store):
+    metrics_store.ingest(_write_followers(tmp_path / f"{PAGE}_followers_1.xlsx", _days("2025-01-01", 5, 1)))
+    revision = metrics_store.revision()
+    metrics_store.ingest(_write_followers(tmp_path / f"{PAGE}_followers_2.xlsx", _days("2025-01-06", 5, 2)))
+
+    assert metrics_store.revision() > revision
+    pinned = metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET, revision)
+    assert pinned.index.max() == pd.Timestamp("2025-01-05")
+    assert len(metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET)) == 10
+    assert metrics_store.pages(revision=0) == []
+
+
+def test_hourly_rows_keep_their_time_of_day(tmp_path, metrics_store):
+    times = [datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 15), datetime(2025, 1, 2, 9)]
+    path = _write_followers(tmp_path / f"{PAGE}_followers_1.xlsx", [(time, 1, i) for i, time in enumerate(times)])
+
+    assert metrics_store.ingest(path) == {SHEET: 3}
+    df = metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET)
+    assert df.index.tolist() == [pd.Timestamp(time) for time in times]
+    assert df["Total followers"].tolist() == [0, 1, 2]
+
+
+def test_failed_export_does_not_keep_others_out(tmp_path, metrics_store):
+    good = _write_followers(tmp_path / f"{PAGE}_followers_1.xlsx", _days("2025-01-01", 5, 1))
+    broken = tmp_path / f"{PAGE}_followers_2.xlsx"
+    broken.write_bytes(open(good, "rb").read()[:1000])
+
+    results, failed = metrics_store.ingest_many([good, str(broken)], max_workers=1)
+    assert list(results) == [good]
+    assert list(failed) == [str(broken)]
+    assert len(metrics_store.load_sheet(PAGE, ingest.FOLLOWERS, SHEET)) == 5
+
+
+def test_competitor_history_across_periods(tmp_path, metrics_store):
+    metrics_store.ingest(_write_competitors(
+        tmp_path / "Test Org_competitor_analytics_1.xlsx", ("1/1/2024", "12/31/2024"), [("A", 100, 10), ("B", 50, 5)],
+    ))
+    # A typed date reads back as "YYYY-MM-DD HH:MM:SS" rather than LinkedIn's MM/DD/YYYY.
+    metrics_store.ingest(_write_competitors(
+        tmp_path / "Test Org_competitor_analytics_2.xlsx", (datetime(2025, 1, 1), datetime(2025, 6, 30)),
+        [("A", 120, 20), ("B", 70, 20)],
+    ))
+    [page] = metrics_store.pages()
+
+    history = metrics_store.competitor_history(page, "COMPETITORS")
+    assert history.columns.tolist() == ["Page", "Period start", "Period end", "Total Followers", "New Followers"]
+    assert history["Period end"].unique().tolist() == [pd.Timestamp("2024-12-31"), pd.Timestamp("2025-06-30")]
+    assert history.loc[history["Page"] == "A", "Total Followers"].tolist() == [100, 120]
+
+    # No competitor selected: no rows, but every metric column.
+    empty = metrics_store.competitor_history(page, "COMPETITORS", [])
+    assert empty.empty
+    assert empty.columns.tolist() == history.columns.tolist()